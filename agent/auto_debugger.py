@@ -2,17 +2,24 @@
 AI-Powered Automatic Code Debugger using Gemini
 Automatically analyzes and fixes all errors, issues, and problems in the codebase
 """
+import contextvars
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 # Add the current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from agent.interactive_editor import InteractiveCodeEditor
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agent.constants import DEBUG_MODES
+from agent.interactive_editor import InteractiveCodeEditor, STATE_DIR_NAME
+from agent.llm import get_llm
+from agent.patching import FIX_MODES, PatchConflict, apply_line_edits, number_lines
+from agent.states import FileAnalysis, FilePatch, FileReview, IssueReport
+from agent.streaming import CodeFenceStream, stream_text, strip_code_fences
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +27,15 @@ load_dotenv()
 # Get project root directly
 PROJECT_ROOT = Path.cwd()
 
+DEFAULT_MAX_CONCURRENCY = 4
+
+SEVERITIES = ("critical", "warning", "suggestion")
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """Raised when a debug session has used up its LLM call budget"""
+
+
 @dataclass
 class CodeIssue:
     file_path: str
@@ -30,13 +46,21 @@ class CodeIssue:
     suggested_fix: Optional[str] = None
 
 class GeminiCodeDebugger:
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 triage: bool = True, flagged_files: Optional[List[str]] = None,
+                 max_llm_calls: Optional[int] = None, fix_mode: str = "patch",
+                 stream: bool = False):
         self.project_path = Path(project_path)
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.1,
-            max_retries=3
-        )
+        self.max_concurrency = max(1, max_concurrency)
+        self.fix_mode = fix_mode
+        self.stream = stream
+        # Triage: only files with static errors (or flagged by the user) are sent to Gemini
+        self.triage = triage
+        self.flagged_files = {Path(f).as_posix() for f in flagged_files or []}
+        self.max_llm_calls = max_llm_calls
+        self.llm_calls = 0
+        self._llm_calls_lock = threading.Lock()
+        self.llm = get_llm()
         self.editor = InteractiveCodeEditor(str(project_path))
         self.issues: List[CodeIssue] = []
         
@@ -45,37 +69,78 @@ class GeminiCodeDebugger:
         print("🧠 Gemini AI: Analyzing entire codebase...")
         print("=" * 50)
         
-        # Get all code files
-        code_files = self._get_all_code_files()
+        # Run the cheap local validators first and only escalate what needs Gemini
+        basic_errors = self.editor.detect_errors()
+        # Each escalated file needs an analysis call now and a fix call in auto_fix_all_issues
+        code_files, _ = self._triage_files(basic_errors, calls_per_file=2)
         all_issues = []
         
-        for file_path in code_files:
-            print(f"🔍 Analyzing: {file_path.relative_to(self.project_path)}")
-            file_issues = self._analyze_single_file(file_path)
-            all_issues.extend(file_issues)
+        # Analyze files concurrently; results are collected in file order so runs are reproducible
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = []
+            for file_path in code_files:
+                print(f"🔍 Analyzing: {file_path.relative_to(self.project_path)}")
+                ctx = contextvars.copy_context()
+                futures.append(pool.submit(ctx.run, self._analyze_single_file, file_path))
+            for future in futures:
+                all_issues.extend(future.result())
         
-        # Also run basic error detection
-        basic_errors = self.editor.detect_errors()
-        for error in basic_errors:
-            issue = CodeIssue(
-                file_path=error['file'],
-                line_number=error['line'],
-                issue_type=error['type'],
-                description=error['message'],
-                severity='critical'
-            )
-            all_issues.append(issue)
+        # Static errors are issues too, whether or not the file was escalated
+        all_issues.extend(self._static_issues(basic_errors))
         
         self.issues = all_issues
         return all_issues
     
+    @staticmethod
+    def _static_issues(static_errors: List[Dict]) -> List[CodeIssue]:
+        """Errors from the local validators as critical issues"""
+        return [CodeIssue(
+            file_path=error['file'],
+            line_number=error['line'],
+            issue_type=error['type'],
+            description=error['message'],
+            severity='critical'
+        ) for error in static_errors]
+    
+    def _triage_files(self, static_errors: List[Dict], calls_per_file: int = 1) -> Tuple[List[Path], List[str]]:
+        """
+        Pick the files worth an LLM call, in stable order and within the remaining budget
+        (calls_per_file calls each); returns them and the relative paths of the files the
+        budget left out
+        """
+        code_files = sorted(self._get_all_code_files())
+        if self.triage:
+            files_with_errors = {Path(error['file']).as_posix() for error in static_errors}
+            escalate = files_with_errors | self.flagged_files
+            selected = [f for f in code_files if f.relative_to(self.project_path).as_posix() in escalate]
+            skipped = len(code_files) - len(selected)
+            if skipped:
+                print(f"⚡ Triage: {skipped} file(s) passed static validation, skipping Gemini for them")
+        else:
+            selected = code_files
+        
+        remaining = self._remaining_llm_calls()
+        over_budget = []
+        if remaining is not None and len(selected) > remaining // calls_per_file:
+            affordable = remaining // calls_per_file
+            print(f"💰 LLM budget: escalating only {affordable} of {len(selected)} file(s)")
+            selected, over_budget = selected[:affordable], selected[affordable:]
+        return selected, [str(f.relative_to(self.project_path)) for f in over_budget]
+    
+    def _remaining_llm_calls(self) -> Optional[int]:
+        if self.max_llm_calls is None:
+            return None
+        with self._llm_calls_lock:
+            return max(0, self.max_llm_calls - self.llm_calls)
+    
     def _get_all_code_files(self) -> List[Path]:
         """Get all code files in the project"""
         extensions = {'.html', '.css', '.js', '.json', '.py', '.md'}
         code_files = []
         
         for ext in extensions:
-            code_files.extend(self.project_path.glob(f"**/*{ext}"))
+            code_files.extend(f for f in self.project_path.glob(f"**/*{ext}")
+                              if STATE_DIR_NAME not in f.relative_to(self.project_path).parts)
         
         return code_files
     
@@ -99,67 +164,50 @@ Please identify and categorize issues as:
 2. WARNING: Code quality issues, potential bugs, deprecated usage
 3. SUGGESTION: Performance optimizations, best practices, improvements
 
-For each issue found, provide:
-- Line number (approximate)
-- Issue type (HTML/CSS/JavaScript/JSON/etc.)
-- Clear description of the problem
-- Suggested fix or improvement
-- Severity level (CRITICAL/WARNING/SUGGESTION)
-
-Format your response as a structured analysis with specific, actionable recommendations.
-Focus on practical fixes that will make the code work correctly and follow best practices.
+Report each real issue once, with its line number, issue type (HTML/CSS/JavaScript/JSON/etc.),
+a one-sentence description, its severity and a short suggested fix.
+Only report concrete, actionable problems; return no issues if the file is correct.
 """
 
-            response = self.llm.invoke(prompt)
-            return self._parse_gemini_analysis(response.content, str(file_path.relative_to(self.project_path)))
+            analysis: FileAnalysis = self._invoke_llm(prompt, schema=FileAnalysis)
+            if analysis is None:
+                return []
+            return self._to_code_issues(str(file_path.relative_to(self.project_path)), analysis.issues)
             
         except Exception as e:
             print(f"❌ Error analyzing {file_path}: {e}")
             return []
     
-    def _parse_gemini_analysis(self, analysis: str, file_path: str) -> List[CodeIssue]:
-        """Parse Gemini's analysis into structured issues"""
+    def _invoke_llm(self, prompt: str, schema=None, on_text=None):
+        """
+        Call Gemini, counting the call against the session budget. Rate-limit
+        retries and backoff happen in the shared client (see agent.llm).
+        With on_text, a plain-text reply is streamed to it and returned as an AIMessage.
+        """
+        with self._llm_calls_lock:
+            if self.max_llm_calls is not None and self.llm_calls >= self.max_llm_calls:
+                raise LLMBudgetExceeded(f"LLM call budget of {self.max_llm_calls} exhausted")
+            self.llm_calls += 1
+        if on_text is not None and schema is None:
+            from langchain_core.messages import AIMessage
+            return AIMessage(content=stream_text(self.llm, prompt, on_text))
+        runnable = self.llm.with_structured_output(schema) if schema else self.llm
+        return runnable.invoke(prompt)
+    
+    @staticmethod
+    def _to_code_issues(file_path: str, reports: List[IssueReport]) -> List[CodeIssue]:
+        """Convert structured issue reports from Gemini into CodeIssue records"""
         issues = []
-        lines = analysis.split('\n')
-        
-        current_issue = None
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Look for severity indicators
-            if any(word in line.upper() for word in ['CRITICAL', 'WARNING', 'SUGGESTION', 'ERROR', 'ISSUE', 'PROBLEM']):
-                if 'CRITICAL' in line.upper() or 'ERROR' in line.upper():
-                    severity = 'critical'
-                elif 'WARNING' in line.upper():
-                    severity = 'warning'
-                else:
-                    severity = 'suggestion'
-                
-                # Extract line number if present
-                line_num = 1
-                import re
-                line_match = re.search(r'line\s*(\d+)', line, re.IGNORECASE)
-                if line_match:
-                    line_num = int(line_match.group(1))
-                
-                # Extract issue type
-                issue_type = 'General'
-                for tech in ['HTML', 'CSS', 'JavaScript', 'JS', 'JSON', 'Python']:
-                    if tech.upper() in line.upper():
-                        issue_type = tech
-                        break
-                
-                issue = CodeIssue(
-                    file_path=file_path,
-                    line_number=line_num,
-                    issue_type=issue_type,
-                    description=line,
-                    severity=severity
-                )
-                issues.append(issue)
-        
+        for report in reports:
+            severity = report.severity.strip().lower()
+            issues.append(CodeIssue(
+                file_path=file_path,
+                line_number=max(1, report.line_number),
+                issue_type=report.issue_type,
+                description=report.description,
+                severity=severity if severity in SEVERITIES else 'suggestion',
+                suggested_fix=report.suggested_fix
+            ))
         return issues
     
     def auto_fix_all_issues(self) -> Dict[str, Any]:
@@ -180,23 +228,44 @@ Focus on practical fixes that will make the code work correctly and follow best
         
         total_fixes = 0
         results = {}
+        skipped = []
+        
+        remaining = self._remaining_llm_calls()
+        if remaining is not None and len(files_to_fix) > remaining:
+            print(f"💰 LLM budget: fixing only {remaining} of {len(files_to_fix)} file(s)")
         
         for file_path, file_issues in files_to_fix.items():
+            if remaining is not None and len(results) + len(skipped) >= remaining:
+                skipped.append(file_path)
+                continue
             print(f"\n🔧 Fixing {len(file_issues)} issues in: {file_path}")
             
-            fixes_applied = self._fix_file_issues(file_path, file_issues)
+            try:
+                fixes_applied = self._fix_file_issues(file_path, file_issues)
+            except LLMBudgetExceeded as e:
+                # A failed patch made a second call for an earlier file; the rest can't be fixed
+                print(f"   💰 {e}, skipping {file_path}")
+                remaining = 0
+                fixes_applied = None
+            if fixes_applied is None:
+                skipped.append(file_path)
+                continue
             total_fixes += fixes_applied
             results[file_path] = fixes_applied
         
         return {
             "status": "success",
             "fixes_applied": total_fixes,
-            "files_processed": len(files_to_fix),
+            "files_processed": len(results),
+            "files_skipped": skipped,
             "detailed_results": results
         }
     
-    def _fix_file_issues(self, file_path: str, issues: List[CodeIssue]) -> int:
-        """Fix all issues in a specific file"""
+    def _fix_file_issues(self, file_path: str, issues: List[CodeIssue]) -> Optional[int]:
+        """
+        Fix all issues in a specific file; returns the number fixed, or None when
+        the LLM budget ran out before the file could be fixed
+        """
         try:
             full_path = self.project_path / file_path
             if not full_path.exists():
@@ -204,15 +273,66 @@ Focus on practical fixes that will make the code work correctly and follow best
                 return 0
             
             original_content = full_path.read_text(encoding='utf-8')
-            file_ext = full_path.suffix.lower()
-            
-            # Create comprehensive fix prompt
             issues_description = "\n".join([
                 f"- Line {issue.line_number}: {issue.description} (Severity: {issue.severity})"
                 for issue in issues
             ])
             
-            prompt = f"""
+            print(f"   🧠 Gemini analyzing and fixing {len(issues)} issues...")
+            fixed_content = None
+            if self.fix_mode == "patch":
+                fixed_content = self._patch_file(file_path, original_content, issues_description)
+                if fixed_content is None and self._remaining_llm_calls() == 0:
+                    print(f"   💰 LLM budget exhausted, no call left to rewrite {file_path}; skipped")
+                    return None
+            if fixed_content is None:
+                fixed_content = self._rewrite_file(file_path, original_content, issues_description)
+            
+            # Save the fixed content
+            full_path.write_text(fixed_content, encoding='utf-8')
+            print(f"   ✅ Fixed and saved: {file_path}")
+            
+            return len(issues)
+            
+        except LLMBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"   ❌ Error fixing {file_path}: {e}")
+            return 0
+    
+    def _patch_file(self, file_path: str, original_content: str, issues_description: str) -> Optional[str]:
+        """Ask Gemini for line-range edits; returns None when they don't apply cleanly"""
+        file_ext = Path(file_path).suffix.lower()
+        prompt = f"""
+You are an expert code fixer. Fix ALL the issues in this {file_ext} file by returning line-range edits.
+
+File: {file_path}
+Issues to fix:
+{issues_description}
+
+Code (each line is prefixed with "<line number> | ", which is NOT part of the file):
+```{file_ext[1:] if file_ext else 'text'}
+{number_lines(original_content)}
+```
+
+Return only the lines that must change. For every edit give start_line and end_line (inclusive),
+original_text copied exactly from those lines WITHOUT the number prefixes, and new_text to put in their place.
+Edits must not overlap. Keep the original functionality and structure.
+"""
+        patch: FilePatch = self._invoke_llm(prompt, schema=FilePatch)
+        if patch is None or not patch.edits:
+            print(f"   ↪️  No usable edits for {file_path}, requesting full file")
+            return None
+        try:
+            return apply_line_edits(original_content, patch.edits)
+        except PatchConflict as e:
+            print(f"   ↪️  Patch did not apply to {file_path} ({e}), requesting full file")
+            return None
+    
+    def _rewrite_file(self, file_path: str, original_content: str, issues_description: str) -> str:
+        """Ask Gemini for the complete corrected file"""
+        file_ext = Path(file_path).suffix.lower()
+        prompt = f"""
 You are an expert code fixer. Please fix ALL the issues in this {file_ext} file.
 
 File: {file_path}
@@ -235,29 +355,108 @@ Please provide the COMPLETE corrected code that:
 Return ONLY the corrected code without any explanations or markdown formatting.
 The output should be ready to save directly to the file.
 """
+        if not self.stream:
+            response = self._invoke_llm(prompt)
+            return strip_code_fences(response.content)
+        
+        # Show the corrected file as it is written, without the code fence
+        print(f"   ✍️  Writing {file_path}:")
+        fence = CodeFenceStream(lambda text: print(text, end="", flush=True))
+        self._invoke_llm(prompt, on_text=fence.feed)
+        print()
+        return fence.close()
+    
+    def review_and_fix_codebase(self) -> Dict[str, Any]:
+        """Single-pass mode: find and fix each file's issues with one Gemini call per file"""
+        print("🧠 Gemini AI: Reviewing and fixing codebase in a single pass...")
+        print("=" * 50)
+        
+        # Static errors pick the files to review and are passed along so the model fixes them too
+        basic_errors = self.editor.detect_errors()
+        code_files, skipped = self._triage_files(basic_errors)
+        static_errors: Dict[str, List[Dict]] = {}
+        for error in basic_errors:
+            static_errors.setdefault(Path(error['file']).as_posix(), []).append(error)
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = []
+            for file_path in code_files:
+                relative = file_path.relative_to(self.project_path)
+                print(f"🔍 Reviewing: {relative}")
+                ctx = contextvars.copy_context()
+                futures.append(pool.submit(ctx.run, self._review_and_fix_file,
+                                           file_path, static_errors.get(relative.as_posix(), [])))
+            reviews = []
+            for file_path, future in zip(code_files, futures):
+                try:
+                    reviews.append(future.result())
+                except LLMBudgetExceeded as e:
+                    relative = str(file_path.relative_to(self.project_path))
+                    print(f"   💰 {e}, skipping {relative}")
+                    skipped.append(relative)
+                    reviews.append(([], 0))
+        
+        # Static errors are issues too, whether or not the model repeated them
+        self.issues = [issue for file_issues, _ in reviews for issue in file_issues]
+        self.issues.extend(self._static_issues(basic_errors))
+        results = {str(path.relative_to(self.project_path)): fixed
+                   for path, (file_issues, fixed) in zip(code_files, reviews) if file_issues}
+        
+        return {
+            "status": "success",
+            "fixes_applied": sum(results.values()),
+            "files_processed": len(results),
+            "files_skipped": sorted(skipped),
+            "detailed_results": results
+        }
+    
+    def _review_and_fix_file(self, file_path: Path, static_errors: List[Dict]) -> tuple:
+        """Ask Gemini for a structured issue list plus the corrected file; returns (issues, fixes applied)"""
+        relative = str(file_path.relative_to(self.project_path))
+        try:
+            content = file_path.read_text(encoding='utf-8')
+            file_ext = file_path.suffix.lower()
+            known_errors = "\n".join(f"- Line {e['line']}: {e['message']}" for e in static_errors) or "- none"
+            
+            prompt = f"""
+You are an expert code reviewer and fixer. Review this {file_ext} file, list ALL of its issues, and return the corrected file.
 
-            print(f"   🧠 Gemini analyzing and fixing {len(issues)} issues...")
-            response = self.llm.invoke(prompt)
-            fixed_content = response.content.strip()
+File: {file_path.name}
+Errors already reported by static validation:
+{known_errors}
+
+Content:
+```{file_ext[1:] if file_ext else 'text'}
+{content}
+```
+
+Classify each issue as critical (syntax errors, broken functionality, security issues),
+warning (code quality issues, potential bugs, deprecated usage) or suggestion (best practices, performance).
+
+If there are issues, fixed_content must be the COMPLETE corrected file that fixes all critical issues and warnings,
+applies beneficial suggestions and keeps the original functionality and structure.
+If the file needs no changes, return no issues and an empty fixed_content.
+"""
             
-            # Remove code block markers if present
-            if fixed_content.startswith('```'):
-                lines = fixed_content.split('\n')
-                if lines[0].startswith('```'):
-                    lines = lines[1:]
-                if lines and lines[-1].strip() == '```':
-                    lines = lines[:-1]
-                fixed_content = '\n'.join(lines)
+            review: FileReview = self._invoke_llm(prompt, schema=FileReview)
+            if review is None:
+                return [], 0
             
-            # Save the fixed content
-            full_path.write_text(fixed_content, encoding='utf-8')
-            print(f"   ✅ Fixed and saved: {file_path}")
+            issues = self._to_code_issues(relative, review.issues)
             
-            return len(issues)
+            # Compare without surrounding whitespace, but save the file as returned
+            fixed_content = review.fixed_content
+            if issues and fixed_content.strip() and fixed_content.strip() != content.strip():
+                file_path.write_text(fixed_content, encoding='utf-8')
+                print(f"   ✅ Fixed and saved: {relative}")
+                return issues, len(issues)
+            return issues, 0
             
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
-            print(f"   ❌ Error fixing {file_path}: {e}")
-            return 0
+            print(f"❌ Error reviewing {relative}: {e}")
+            return [], 0
     
     def verify_fixes(self) -> Dict[str, Any]:
         """Verify that all fixes were successful"""
@@ -322,8 +521,27 @@ The output should be ready to save directly to the file.
             print(f"   {i}. {issue.file_path}:{issue.line_number} - {issue.description}")
 
 
-def auto_debug_project(project_path: str = None) -> Dict[str, Any]:
-    """Main function to automatically debug entire project"""
+def auto_debug_project(project_path: str = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                       mode: str = "two_phase", triage: bool = True,
+                       flagged_files: Optional[List[str]] = None,
+                       max_llm_calls: Optional[int] = None, fix_mode: str = "patch",
+                       stream: bool = False) -> Dict[str, Any]:
+    """
+    Main function to automatically debug entire project
+
+    mode="two_phase" analyzes every file and then fixes it in a second call;
+    mode="single_pass" gets the issues and the corrected file in one call per file.
+    With triage (the default) only files failing static validation, plus
+    flagged_files, are sent to Gemini; max_llm_calls caps the session's calls.
+    In two_phase mode fix_mode="patch" requests line-range edits (falling back
+    to a full rewrite if they don't apply) and fix_mode="rewrite" the whole file.
+    stream=True prints full-file rewrites as they arrive (bypassing the response cache).
+    """
+    if mode not in DEBUG_MODES:
+        raise ValueError(f"Unknown debug mode '{mode}'. Expected one of: {', '.join(DEBUG_MODES)}")
+    if fix_mode not in FIX_MODES:
+        raise ValueError(f"Unknown fix mode '{fix_mode}'. Expected one of: {', '.join(FIX_MODES)}")
+    
     if project_path is None:
         project_path = str(PROJECT_ROOT)
     
@@ -333,17 +551,28 @@ def auto_debug_project(project_path: str = None) -> Dict[str, Any]:
     print("🤖 Using: Google Gemini 2.0 Flash AI")
     print()
     
-    debugger = GeminiCodeDebugger(project_path)
+    debugger = GeminiCodeDebugger(project_path, max_concurrency=max_concurrency, triage=triage,
+                                  flagged_files=flagged_files, max_llm_calls=max_llm_calls,
+                                  fix_mode=fix_mode, stream=stream)
     
-    # Step 1: Analyze entire codebase
-    issues = debugger.analyze_entire_codebase()
-    debugger.show_analysis_summary()
-    
-    if not issues:
-        return {"status": "success", "message": "No issues found in the project!"}
-    
-    # Step 2: Auto-fix all issues
-    fix_results = debugger.auto_fix_all_issues()
+    if mode == "single_pass":
+        # Steps 1 + 2: Analyze and fix each file in one call
+        fix_results = debugger.review_and_fix_codebase()
+        issues = debugger.issues
+        debugger.show_analysis_summary()
+        
+        if not issues:
+            return {"status": "success", "message": "No issues found in the project!"}
+    else:
+        # Step 1: Analyze entire codebase
+        issues = debugger.analyze_entire_codebase()
+        debugger.show_analysis_summary()
+        
+        if not issues:
+            return {"status": "success", "message": "No issues found in the project!"}
+        
+        # Step 2: Auto-fix all issues
+        fix_results = debugger.auto_fix_all_issues()
     
     # Step 3: Verify fixes
     verification_results = debugger.verify_fixes()
@@ -375,10 +604,27 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Auto-debug project using Gemini AI')
     parser.add_argument('--project', '-p', type=str, help='Project path to debug')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f'Files analyzed at once (default: {DEFAULT_MAX_CONCURRENCY})')
+    parser.add_argument('--mode', choices=DEBUG_MODES, default='two_phase',
+                        help='two_phase: analyze then fix (default); single_pass: one call per file')
+    parser.add_argument('--no-triage', action='store_true',
+                        help='Send every code file to Gemini, not just files failing static validation')
+    parser.add_argument('--flag', action='append', default=[], metavar='FILE',
+                        help='Always send this project-relative file to Gemini (repeatable)')
+    parser.add_argument('--max-llm-calls', type=int, default=None,
+                        help='Maximum Gemini calls for this debug session')
+    parser.add_argument('--fix-mode', choices=FIX_MODES, default='patch',
+                        help='patch: line-range edits with full-rewrite fallback (default); rewrite: whole files')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream full-file rewrites to the terminal as Gemini writes them')
     args = parser.parse_args()
     
     project_path = args.project or str(PROJECT_ROOT)
-    results = auto_debug_project(project_path)
+    results = auto_debug_project(project_path, max_concurrency=args.max_concurrency, mode=args.mode,
+                                 triage=not args.no_triage, flagged_files=args.flag,
+                                 max_llm_calls=args.max_llm_calls, fix_mode=args.fix_mode,
+                                 stream=args.stream)
     
     print(f"\n📋 Final Results:")
     print(f"   Status: {results['overall_status']}")
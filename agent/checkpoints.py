@@ -0,0 +1,128 @@
+"""
+Build Checkpoints
+SQLite-backed LangGraph checkpointer, so a failed or interrupted build resumes from its last completed node
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CHECKPOINT_DB = ".checkpoints/builds.sqlite"
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+class BuildNotFound(LookupError):
+    """Raised when resuming a build that has no checkpoints"""
+
+
+class BuildCheckpointer:
+    """
+    Mixed into SqliteSaver so it also serves agent.ainvoke.
+
+    The library's SqliteSaver is sync-only; here the async methods run the
+    sync ones on a worker thread (the connection is shared across threads and
+    guarded by the saver's lock), so sync and async builds use one database.
+    The combined class is made in get_checkpointer, so langgraph-checkpoint-sqlite
+    is only imported when checkpoints are enabled.
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def threads(self) -> List[Dict[str, Any]]:
+        """The latest checkpoint of every stored build, newest first."""
+        with self.cursor(transaction=False) as cur:
+            thread_ids = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(rowid) DESC")]
+        builds = []
+        for thread_id in thread_ids:
+            latest = self.get_tuple(thread_config(thread_id))
+            if latest is None:
+                continue
+            values = latest.checkpoint["channel_values"]
+            builds.append({"thread_id": thread_id,
+                           "step": latest.metadata.get("step"),
+                           "project_root": values.get("project_root"),
+                           "user_prompt": values.get("user_prompt", ""),
+                           "saved_at": latest.checkpoint["ts"]})
+        return builds
+
+
+def new_thread_id() -> str:
+    """A fresh id for one build's checkpoint thread."""
+    return uuid.uuid4().hex[:12]
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def get_checkpointer() -> Optional[BuildCheckpointer]:
+    """
+    The process-wide build checkpointer, or None when BUILD_CHECKPOINTS=off.
+
+    The database path comes from BUILD_CHECKPOINT_DB (default
+    .checkpoints/builds.sqlite in the working directory).
+    """
+    global _checkpointer
+    if os.getenv("BUILD_CHECKPOINTS", "on").lower() in ("0", "off", "false", "no"):
+        return None
+
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+
+            path = Path(os.getenv("BUILD_CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            # a checkpoint is committed after every node; WAL without a full fsync
+            # per commit keeps that cheap and still survives a crash of the build
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _checkpointer = type("SqliteBuildCheckpointer", (BuildCheckpointer, SqliteSaver), {})(conn)
+        return _checkpointer
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List or delete checkpointed builds')
+    parser.add_argument('--delete', metavar='THREAD_ID', nargs='+', help='Delete these builds\' checkpoints')
+    parser.add_argument('--clear', action='store_true', help='Delete every checkpoint')
+    args = parser.parse_args()
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        print("Build checkpoints are disabled (BUILD_CHECKPOINTS=off)")
+    elif args.delete or args.clear:
+        thread_ids = args.delete or [build["thread_id"] for build in checkpointer.threads()]
+        for thread_id in thread_ids:
+            checkpointer.delete_thread(thread_id)
+        print(f"🧹 Deleted {len(thread_ids)} build(s)")
+    else:
+        builds = checkpointer.threads()
+        if not builds:
+            print("No resumable builds")
+        for build in builds:
+            print(f"🧵 {build['thread_id']}  step {build['step']}  {build['saved_at'][:19]}  "
+                  f"{build['project_root']}  {build['user_prompt'][:50]!r}")
@@ -0,0 +1,8 @@
+"""
+Constants
+Dependency-free values shared by the CLIs and the agents, so argument parsing stays fast
+"""
+
+# "two_phase" analyzes every file, then sends each file again with its issues to be fixed;
+# "single_pass" asks for the issue list and the corrected file in one structured call
+DEBUG_MODES = ("two_phase", "single_pass")
@@ -0,0 +1,223 @@
+"""
+Edit Context Packer
+Ranks project files and sections by relevance to a request and packs them into a token budget
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Set
+
+DEFAULT_TOKEN_BUDGET = 24000
+SECTION_LINES = 40
+# Names listed per category in a file summary before the rest are counted
+SUMMARY_ITEMS = 30
+# Score added to a section for each HTML id/class it shares with a relevant section
+LINK_WEIGHT = 1.0
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "make", "please", "should", "from",
+    "into", "when", "then", "them", "more", "less", "add", "use", "can", "all", "its",
+    "not", "are", "but", "was", "has", "have", "want", "would", "like", "also", "some",
+}
+
+
+@dataclass
+class Section:
+    file: str
+    start_line: int
+    text: str
+    score: float = 0.0
+    identifiers: Set[str] = field(default_factory=set)
+
+    @property
+    def end_line(self) -> int:
+        return self.start_line + self.text.count("\n")
+
+
+@dataclass
+class PackedContext:
+    files: Dict[str, str]  # included in full, safe to rewrite
+    excerpts: Dict[str, List[Section]]  # partially included, in line order
+    omitted: List[str]
+    tokens: int
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.excerpts or self.omitted)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _singular(term: str) -> str:
+    """Strip simple English plurals, so "buttons" matches "button" and "boxes" matches "box"."""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 4 and term.endswith(("ches", "shes", "sses", "xes")):
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+        return term[:-1]
+    return term
+
+
+def _terms(text: str) -> List[str]:
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)  # split camelCase
+    return [_singular(t) for t in re.findall(r"[a-z][a-z0-9]{2,}", text.lower()) if t not in _STOPWORDS]
+
+
+def _fill_order(name: str, content: str) -> tuple:
+    """Order for spare budget: markup and styles first, then the smallest files."""
+    return Path(name).suffix.lower() not in (".html", ".css"), len(content), name
+
+
+def _identifiers(text: str, suffix: str) -> Set[str]:
+    """HTML ids/classes defined or referenced by a chunk of HTML, CSS or JS."""
+    found: Set[str] = set()
+    if suffix == ".html":
+        found.update("#" + i for i in re.findall(r'\bid\s*=\s*["\']([\w-]+)', text))
+        for classes in re.findall(r'\bclass\s*=\s*["\']([^"\']+)', text):
+            found.update("." + c for c in classes.split())
+    elif suffix == ".css":
+        found.update(re.findall(r"[#.][A-Za-z_][\w-]*(?=[^{}]*\{)", text))
+    elif suffix == ".js":
+        found.update("#" + i for i in re.findall(r'getElementById\(\s*["\']([\w-]+)', text))
+        found.update("." + c for c in re.findall(r'getElementsByClassName\(\s*["\']([\w-]+)', text))
+        found.update("." + c for c in re.findall(r'classList\.\w+\(\s*["\']([\w-]+)', text))
+        for selector in re.findall(r'querySelector(?:All)?\(\s*["\']([^"\']+)', text):
+            found.update(re.findall(r"[#.][A-Za-z_][\w-]*", selector))
+    return found
+
+
+def split_sections(name: str, content: str, max_lines: int = SECTION_LINES) -> List[Section]:
+    """Split a file at blank lines into sections of at most max_lines lines."""
+    suffix = Path(name).suffix.lower()
+    lines = content.splitlines()
+    sections: List[Section] = []
+    start, chunk = 1, []
+    for number, line in enumerate(lines, 1):
+        chunk.append(line)
+        at_break = not line.strip() and len(chunk) >= max_lines // 2
+        if at_break or len(chunk) >= max_lines or number == len(lines):
+            text = "\n".join(chunk)
+            sections.append(Section(name, start, text, identifiers=_identifiers(text, suffix)))
+            start, chunk = number + 1, []
+    return sections
+
+
+def summarize_file(name: str, content: str, max_items: int = SUMMARY_ITEMS) -> str:
+    """
+    One-line summary of a written file: size, linked files, the ids/classes it
+    defines or uses and its top-level JS functions. Gives later steps what they
+    need to integrate with the file without reading it again.
+    """
+    suffix = Path(name).suffix.lower()
+    parts = [f"{len(content.splitlines())} lines"]
+    links = re.findall(r'<(?:link[^>]*\bhref|script[^>]*\bsrc)\s*=\s*["\']([^"\']+)', content)
+    if links:
+        parts.append("links " + ", ".join(dict.fromkeys(links)))
+    if suffix == ".js":
+        functions = re.findall(r"\bfunction\s+([A-Za-z_$][\w$]*)", content)
+        functions += re.findall(r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)", content)
+        functions += re.findall(r"^\s*class\s+([A-Za-z_$][\w$]*)", content, re.MULTILINE)
+        if functions:
+            parts.append("defines " + _capped(list(dict.fromkeys(functions)), max_items))
+    identifiers = sorted(_identifiers(content, suffix))
+    if identifiers:
+        parts.append(("uses " if suffix == ".js" else "selectors ") + _capped(identifiers, max_items))
+    return "; ".join(parts)
+
+
+def _capped(items: List[str], limit: int) -> str:
+    shown = ", ".join(items[:limit])
+    return shown + (f" (+{len(items) - limit} more)" if len(items) > limit else "")
+
+
+def _score_sections(sections: List[Section], query: str):
+    query_terms = set(_terms(query))
+    section_terms = [_terms(s.text) for s in sections]
+    document_frequency = {t: sum(1 for terms in section_terms if t in terms) for t in query_terms}
+    for section, terms in zip(sections, section_terms):
+        for term in query_terms:
+            tf = terms.count(term)
+            if tf:
+                idf = math.log(1 + len(sections) / document_frequency[term])
+                section.score += idf * (1 + math.log(tf))
+
+    # Follow id/class links one hop: markup, styles and scripts for the same element belong together.
+    # Seeds come from the matching lines (whole rules for CSS) so shared layout classes don't spread.
+    seeds = {i for s in sections for i in s.identifiers if set(_terms(i)) & query_terms}
+    for section in sections:
+        if section.score > 0:
+            suffix = Path(section.file).suffix.lower()
+            units = re.findall(r"[^{}]*\{[^{}]*\}", section.text) if suffix == ".css" else section.text.splitlines()
+            seeds.update(i for unit in units if set(_terms(unit)) & query_terms
+                         for i in _identifiers(unit, suffix))
+    for section in sections:
+        section.score += LINK_WEIGHT * len(section.identifiers & seeds)
+
+
+def pack_context(files: Dict[str, str], query: str,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET) -> PackedContext:
+    """
+    Choose what of `files` to show the model for `query` within token_budget.
+
+    If everything fits, every file is included in full. Otherwise files are
+    ranked by their best section; relevant files are included whole while they
+    fit, then the best sections of the rest. Budget left over (all of it when
+    nothing matches the query) goes to the remaining files in _fill_order,
+    whole or from the top; what still doesn't fit is omitted.
+    """
+    total = sum(estimate_tokens(content) for content in files.values())
+    if total <= token_budget:
+        return PackedContext(files=dict(files), excerpts={}, omitted=[], tokens=total)
+
+    sections = [s for name, content in files.items() for s in split_sections(name, content)]
+    _score_sections(sections, query)
+    by_file: Dict[str, List[Section]] = {name: [] for name in files}
+    for section in sections:
+        by_file[section.file].append(section)
+    file_score = {name: max((s.score for s in secs), default=0.0) for name, secs in by_file.items()}
+    ranked = sorted(files, key=lambda name: (-file_score[name], name))
+
+    packed = PackedContext(files={}, excerpts={}, omitted=[], tokens=0)
+    for name in ranked:
+        remaining = token_budget - packed.tokens
+        cost = estimate_tokens(files[name])
+        if file_score[name] > 0 and cost <= remaining:
+            packed.files[name] = files[name]
+            packed.tokens += cost
+            continue
+
+        chosen = []
+        for section in sorted(by_file[name], key=lambda s: (-s.score, s.start_line)):
+            cost = estimate_tokens(section.text)
+            if section.score <= 0 or cost > token_budget - packed.tokens:
+                continue
+            chosen.append(section)
+            packed.tokens += cost
+        if chosen:
+            packed.excerpts[name] = sorted(chosen, key=lambda s: s.start_line)
+        else:
+            packed.omitted.append(name)
+
+    for name in sorted(packed.omitted, key=lambda name: _fill_order(name, files[name])):
+        cost = estimate_tokens(files[name])
+        if cost <= token_budget - packed.tokens:
+            packed.files[name] = files[name]
+            packed.tokens += cost
+            packed.omitted.remove(name)
+            continue
+        leading = []
+        for section in by_file[name]:
+            cost = estimate_tokens(section.text)
+            if cost > token_budget - packed.tokens:
+                break
+            leading.append(section)
+            packed.tokens += cost
+        if leading:
+            packed.excerpts[name] = leading
+            packed.omitted.remove(name)
+    return packed
@@ -1,30 +1,34 @@
+import asyncio
+import threading
+from typing import Optional
+
 from dotenv import load_dotenv
-from langchain.globals import set_verbose, set_debug
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.runnables import RunnableLambda
 from langgraph.constants import END
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import create_react_agent
 
+from agent.checkpoints import get_checkpointer
+from agent.context_packer import summarize_file
+from agent.llm import get_llm
+from agent.metrics import STEP_RUN_PREFIX
 from agent.prompts import *
+from agent.scheduler import AsyncStepFeed, StepFeed, find_concurrent_steps, run_step_graph, run_step_graph_async
+from agent.streaming import JsonLineStream, astream_text, stream_text
 from agent.states import *
-from agent.tools import write_file, read_file, get_current_directory, list_files, detect_project_errors, start_interactive_editor, auto_debug_with_gemini
+from agent.tools import write_file, read_file, get_current_directory, list_files, detect_project_errors, start_interactive_editor, auto_debug_with_gemini, safe_path_for_project
+from agent.tracing import configure_tracing
 
 _ = load_dotenv()
 
-set_debug(True)
-set_verbose(True)
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.1,
-    max_retries=3
-)
+# TRACE_LEVEL / TRACE_FILE / TRACE_SAMPLE_RATE control what gets traced (see agent.tracing)
+configure_tracing()
 
 
 def planner_agent(state: dict) -> dict:
     """Converts user prompt into a structured Plan."""
     user_prompt = state["user_prompt"]
-    resp = llm.with_structured_output(Plan).invoke(
+    resp = get_llm().with_structured_output(Plan).invoke(
         planner_prompt(user_prompt)
     )
     if resp is None:
@@ -32,51 +36,288 @@ def planner_agent(state: dict) -> dict:
     return {"plan": resp}
 
 
+async def planner_agent_async(state: dict) -> dict:
+    """Async planner_agent for agent.ainvoke."""
+    resp = await get_llm().with_structured_output(Plan).ainvoke(
+        planner_prompt(state["user_prompt"])
+    )
+    if resp is None:
+        raise ValueError("Planner did not return a valid response.")
+    return {"plan": resp}
+
+
 def architect_agent(state: dict) -> dict:
     """Creates TaskPlan from Plan."""
+    if state.get("stream_architect"):
+        return streaming_architect_agent(state)
+
     plan: Plan = state["plan"]
-    resp = llm.with_structured_output(TaskPlan).invoke(
+    resp = get_llm().with_structured_output(TaskPlan).invoke(
         architect_prompt(plan=plan.model_dump_json())
     )
     if resp is None:
         raise ValueError("Planner did not return a valid response.")
 
     resp.plan = plan
-    print(resp.model_dump_json())
+    print(f"📋 Task plan: {len(resp.implementation_steps)} implementation step(s)")
     return {"task_plan": resp}
 
 
-def coder_agent(state: dict) -> dict:
-    """LangGraph tool-using coder agent."""
+async def architect_agent_async(state: dict) -> dict:
+    """Async architect_agent for agent.ainvoke."""
+    if state.get("stream_architect"):
+        return await streaming_architect_agent_async(state)
+
+    plan: Plan = state["plan"]
+    resp = await get_llm().with_structured_output(TaskPlan).ainvoke(
+        architect_prompt(plan=plan.model_dump_json())
+    )
+    if resp is None:
+        raise ValueError("Planner did not return a valid response.")
+
+    resp.plan = plan
+    print(f"📋 Task plan: {len(resp.implementation_steps)} implementation step(s)")
+    return {"task_plan": resp}
+
+
+DEFAULT_CODER_CONCURRENCY = 4
+CODER_TOOLS = [read_file, write_file, list_files, get_current_directory]
+
+_react_agent = None  # (llm, compiled ReAct agent)
+_react_agent_lock = threading.Lock()
+
+
+def _coder_react_agent():
+    """
+    The ReAct coder, compiled once and reused by every step of every build.
+
+    It holds no per-build state (file tools resolve paths through the project
+    root context variable), so it is only rebuilt if the shared client changes.
+    """
+    global _react_agent
+    llm = get_llm()
+    with _react_agent_lock:
+        if _react_agent is None or _react_agent[0] is not llm:
+            _react_agent = (llm, create_react_agent(llm, CODER_TOOLS))
+        return _react_agent[1]
+
+
+def _coder_messages(task: ImplementationTask, existing_content: str, parallel_files: list[str] = None,
+                    file_summaries: dict[str, str] = None) -> dict:
+    """Builds the ReAct input for one implementation step."""
+    system_prompt = coder_system_prompt()
+    user_prompt = (
+        f"Task: {task.task_description}\n"
+        f"File: {task.filepath}\n"
+        f"Existing content:\n{existing_content}\n"
+        "Use write_file(path, content) to save your changes."
+    )
+    summaries = {path: summary for path, summary in (file_summaries or {}).items()
+                 if path != task.filepath and path not in (parallel_files or [])}
+    if summaries:
+        user_prompt += (
+            "\nFiles already written in this build (call read_file only if you need their exact content):\n"
+            + "\n".join(f"- {path}: {summary}" for path, summary in summaries.items())
+        )
+    if parallel_files:
+        user_prompt += (
+            "\nThese files are being written in parallel right now, do not read them: "
+            f"{', '.join(parallel_files)}"
+        )
+
+    return {"messages": [{"role": "system", "content": system_prompt},
+                         {"role": "user", "content": user_prompt}]}
+
+
+def _summarize_written_file(coder_state: CoderState, filepath: str):
+    """Record a summary of the file a step wrote, for the steps after it."""
+    path = safe_path_for_project(filepath)
+    if path.is_file():
+        content = path.read_text(encoding="utf-8", errors="replace")
+        coder_state.file_summaries[filepath] = summarize_file(filepath, content)
+
+
+def _run_coder_step(coder_state: CoderState, task: ImplementationTask, parallel_files: list[str] = None) -> str:
+    """Runs one ReAct coder conversation for a single implementation step."""
+    existing_content = read_file.invoke(task.filepath)
+    messages = _coder_messages(task, existing_content, parallel_files, dict(coder_state.file_summaries))
+
+    result = _coder_react_agent().invoke(messages, {"run_name": STEP_RUN_PREFIX + task.filepath})
+    _summarize_written_file(coder_state, task.filepath)
+    return str(result["messages"][-1].content)
+
+
+async def _run_coder_step_async(coder_state: CoderState, task: ImplementationTask,
+                                parallel_files: list[str] = None) -> str:
+    """Async _run_coder_step; the ReAct loop awaits Gemini and the async file tools."""
+    existing_content = await read_file.ainvoke(task.filepath)
+    messages = _coder_messages(task, existing_content, parallel_files, dict(coder_state.file_summaries))
+
+    result = await _coder_react_agent().ainvoke(messages, {"run_name": STEP_RUN_PREFIX + task.filepath})
+    await asyncio.to_thread(_summarize_written_file, coder_state, task.filepath)
+    return str(result["messages"][-1].content)
+
+
+def _get_coder_state(state: dict) -> CoderState:
     coder_state: CoderState = state.get("coder_state")
     if coder_state is None:
         coder_state = CoderState(task_plan=state["task_plan"], current_step_idx=0)
+    return coder_state
+
+
+def coder_agent(state: dict) -> dict:
+    """LangGraph tool-using coder agent."""
+    if state.get("parallel_coder"):
+        return parallel_coder_agent(state)
 
+    coder_state = _get_coder_state(state)
     steps = coder_state.task_plan.implementation_steps
     if coder_state.current_step_idx >= len(steps):
         return {"coder_state": coder_state, "status": "DONE"}
 
     current_task = steps[coder_state.current_step_idx]
-    existing_content = read_file.run(current_task.filepath)
+    coder_state.step_results.append(_run_coder_step(coder_state, current_task))
 
-    system_prompt = coder_system_prompt()
-    user_prompt = (
-        f"Task: {current_task.task_description}\n"
-        f"File: {current_task.filepath}\n"
-        f"Existing content:\n{existing_content}\n"
-        "Use write_file(path, content) to save your changes."
-    )
+    coder_state.current_step_idx += 1
+    return {"coder_state": coder_state}
 
-    coder_tools = [read_file, write_file, list_files, get_current_directory]
-    react_agent = create_react_agent(llm, coder_tools)
 
-    react_agent.invoke({"messages": [{"role": "system", "content": system_prompt},
-                                     {"role": "user", "content": user_prompt}]})
+async def coder_agent_async(state: dict) -> dict:
+    """Async coder_agent for agent.ainvoke."""
+    if state.get("parallel_coder"):
+        return await parallel_coder_agent_async(state)
+
+    coder_state = _get_coder_state(state)
+    steps = coder_state.task_plan.implementation_steps
+    if coder_state.current_step_idx >= len(steps):
+        return {"coder_state": coder_state, "status": "DONE"}
+
+    current_task = steps[coder_state.current_step_idx]
+    coder_state.step_results.append(await _run_coder_step_async(coder_state, current_task))
 
     coder_state.current_step_idx += 1
     return {"coder_state": coder_state}
 
 
+def parallel_coder_agent(state: dict) -> dict:
+    """Runs independent implementation steps concurrently, following the plan's dependency DAG."""
+    coder_state = _get_coder_state(state)
+    steps = coder_state.task_plan.implementation_steps[coder_state.current_step_idx:]
+    max_concurrency = state.get("max_concurrency", DEFAULT_CODER_CONCURRENCY)
+    concurrent_steps = find_concurrent_steps(steps)
+
+    def run_step(idx: int, task: ImplementationTask) -> str:
+        # Files with no ordering relation to this step may be mid-write
+        parallel_files = sorted({steps[other].filepath for other in concurrent_steps[idx]})
+        print(f"🧩 Coding step {coder_state.current_step_idx + idx + 1}: {task.filepath}")
+        return _run_coder_step(coder_state, task, parallel_files)
+
+    coder_state.step_results.extend(run_step_graph(steps, run_step, max_concurrency))
+    coder_state.current_step_idx += len(steps)
+    return {"coder_state": coder_state, "status": "DONE"}
+
+
+async def parallel_coder_agent_async(state: dict) -> dict:
+    """Async parallel_coder_agent; steps run as tasks on the caller's event loop."""
+    coder_state = _get_coder_state(state)
+    steps = coder_state.task_plan.implementation_steps[coder_state.current_step_idx:]
+    max_concurrency = state.get("max_concurrency", DEFAULT_CODER_CONCURRENCY)
+    concurrent_steps = find_concurrent_steps(steps)
+
+    async def run_step(idx: int, task: ImplementationTask) -> str:
+        parallel_files = sorted({steps[other].filepath for other in concurrent_steps[idx]})
+        print(f"🧩 Coding step {coder_state.current_step_idx + idx + 1}: {task.filepath}")
+        return await _run_coder_step_async(coder_state, task, parallel_files)
+
+    coder_state.step_results.extend(await run_step_graph_async(steps, run_step, max_concurrency))
+    coder_state.current_step_idx += len(steps)
+    return {"coder_state": coder_state, "status": "DONE"}
+
+
+def _streamed_task(obj: dict) -> Optional[ImplementationTask]:
+    try:
+        return ImplementationTask.model_validate(obj)
+    except ValueError:
+        print(f"⚠️ Skipping malformed task line: {obj}")
+        return None
+
+
+def _streamed_coder_state(plan: Plan, steps: list[ImplementationTask], step_results: list[str],
+                          file_summaries: dict[str, str]) -> dict:
+    task_plan = TaskPlan(implementation_steps=steps)
+    task_plan.plan = plan
+    print(f"📋 Task plan: {len(steps)} implementation step(s), coded while streaming")
+    coder_state = CoderState(task_plan=task_plan, current_step_idx=len(steps),
+                             step_results=step_results, file_summaries=file_summaries)
+    return {"task_plan": task_plan, "coder_state": coder_state}
+
+
+def streaming_architect_agent(state: dict) -> dict:
+    """
+    Architect that codes while it plans: the task plan streams in as JSON
+    lines and each step goes to a coder work queue as soon as its line is
+    parsed, so the first files are written while later steps are still being
+    planned. Steps respect the plan's dependencies and run max_concurrency at
+    a time with parallel_coder, else one at a time. The coder node then has
+    nothing left to do. Falls back to architect_agent if no step streams in.
+    """
+    plan: Plan = state["plan"]
+    coder_state = CoderState(task_plan=TaskPlan(implementation_steps=[]))
+    max_concurrency = state.get("max_concurrency", DEFAULT_CODER_CONCURRENCY) if state.get("parallel_coder") else 1
+
+    def run_step(idx: int, task: ImplementationTask) -> str:
+        print(f"🧩 Coding step {idx + 1}: {task.filepath}")
+        return _run_coder_step(coder_state, task, feed.running_files(idx))
+
+    def on_task(obj: dict):
+        task = _streamed_task(obj)
+        if task is not None:
+            feed.add(task)
+
+    feed = StepFeed(run_step, max_concurrency)
+    lines = JsonLineStream(on_task)
+    try:
+        stream_text(get_llm(), architect_stream_prompt(plan=plan.model_dump_json()), lines.feed)
+        lines.close()
+    finally:
+        # Steps already queued finish (or fail) before the node returns
+        step_results = feed.close()
+
+    if not feed.steps:
+        print("⚠️ Architect streamed no tasks, asking for a structured task plan")
+        return architect_agent({**state, "stream_architect": False})
+    return _streamed_coder_state(plan, feed.steps, step_results, coder_state.file_summaries)
+
+
+async def streaming_architect_agent_async(state: dict) -> dict:
+    """Async streaming_architect_agent; steps run as tasks on the caller's event loop."""
+    plan: Plan = state["plan"]
+    coder_state = CoderState(task_plan=TaskPlan(implementation_steps=[]))
+    max_concurrency = state.get("max_concurrency", DEFAULT_CODER_CONCURRENCY) if state.get("parallel_coder") else 1
+
+    async def run_step(idx: int, task: ImplementationTask) -> str:
+        print(f"🧩 Coding step {idx + 1}: {task.filepath}")
+        return await _run_coder_step_async(coder_state, task, feed.running_files(idx))
+
+    def on_task(obj: dict):
+        task = _streamed_task(obj)
+        if task is not None:
+            feed.add(task)
+
+    feed = AsyncStepFeed(run_step, max_concurrency)
+    lines = JsonLineStream(on_task)
+    try:
+        await astream_text(get_llm(), architect_stream_prompt(plan=plan.model_dump_json()), lines.feed)
+        lines.close()
+    finally:
+        step_results = await feed.close()
+
+    if not feed.steps:
+        print("⚠️ Architect streamed no tasks, asking for a structured task plan")
+        return await architect_agent_async({**state, "stream_architect": False})
+    return _streamed_coder_state(plan, feed.steps, step_results, coder_state.file_summaries)
+
+
 def error_detector_agent(state: dict) -> dict:
     """Detects errors in the generated project."""
     print("🔍 Checking for errors in generated project...")
@@ -95,6 +336,11 @@ def error_detector_agent(state: dict) -> dict:
     }
 
 
+async def error_detector_agent_async(state: dict) -> dict:
+    """Async error_detector_agent; validation is blocking file and Node.js work, so it runs on a worker thread."""
+    return await asyncio.to_thread(error_detector_agent, state)
+
+
 def interactive_editor_agent(state: dict) -> dict:
     """Interactive editor for fixing errors."""
     error_report = state.get("error_report", "")
@@ -131,6 +377,11 @@ def interactive_editor_agent(state: dict) -> dict:
         }
 
 
+async def interactive_editor_agent_async(state: dict) -> dict:
+    """Async interactive_editor_agent; the session reads stdin, so it runs on a worker thread."""
+    return await asyncio.to_thread(interactive_editor_agent, state)
+
+
 def auto_debugger_agent(state: dict) -> dict:
     """AI-powered automatic debugger using Gemini."""
     print("\n🤖 Starting AI Auto-Debugger Session")
@@ -140,7 +391,8 @@ def auto_debugger_agent(state: dict) -> dict:
     
     try:
         # Use the auto-debugger tool
-        result = auto_debug_with_gemini.invoke({})
+        result = auto_debug_with_gemini.invoke({"mode": state.get("debug_mode", "two_phase"),
+                                                "max_llm_calls": state.get("debug_max_llm_calls")})
         print(result)
         
         # After auto-debugging, check for errors again
@@ -164,14 +416,21 @@ def auto_debugger_agent(state: dict) -> dict:
         }
 
 
-graph = StateGraph(dict)
+async def auto_debugger_agent_async(state: dict) -> dict:
+    """Async auto_debugger_agent; the debugger is a sync tool with its own thread pool, so it runs on a worker thread."""
+    return await asyncio.to_thread(auto_debugger_agent, state)
+
 
-graph.add_node("planner", planner_agent)
-graph.add_node("architect", architect_agent)
-graph.add_node("coder", coder_agent)
-graph.add_node("error_detector", error_detector_agent)
-graph.add_node("interactive_editor", interactive_editor_agent)
-graph.add_node("auto_debugger", auto_debugger_agent)
+graph = StateGraph(BuildState)
+
+# Each node carries a sync and an async implementation: agent.invoke runs the
+# former, agent.ainvoke the latter, so one compiled graph serves both.
+graph.add_node("planner", RunnableLambda(planner_agent, planner_agent_async))
+graph.add_node("architect", RunnableLambda(architect_agent, architect_agent_async))
+graph.add_node("coder", RunnableLambda(coder_agent, coder_agent_async))
+graph.add_node("error_detector", RunnableLambda(error_detector_agent, error_detector_agent_async))
+graph.add_node("interactive_editor", RunnableLambda(interactive_editor_agent, interactive_editor_agent_async))
+graph.add_node("auto_debugger", RunnableLambda(auto_debugger_agent, auto_debugger_agent_async))
 
 # Initial flow
 graph.add_edge("planner", "architect")
@@ -222,9 +481,25 @@ graph.add_conditional_edges(
     {"error_detector": "error_detector", "END": END}
 )
 
-graph.set_entry_point("planner")
-agent = graph.compile()
+def entry_point(state: dict) -> str:
+    """Start at the coder when the build was handed a plan and task plan (see agent.plan_cache)."""
+    return "coder" if state.get("plan") and state.get("task_plan") else "planner"
+
+graph.set_conditional_entry_point(entry_point, {"planner": "planner", "coder": "coder"})
+
+
+def __getattr__(name: str):
+    # The graph is compiled on first use of `agent`, not at import time. Every
+    # completed node is checkpointed (see agent.checkpoints), so invocations pass
+    # a thread_id and a failed build can resume where it stopped
+    if name == "agent":
+        compiled = graph.compile(checkpointer=get_checkpointer())
+        globals()["agent"] = compiled
+        return compiled
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
-    result = agent.invoke({"user_prompt": "Build a colourful modern todo app in html css and js"},
+    result = graph.compile().invoke({"user_prompt": "Build a colourful modern todo app in html css and js"},
                           {"recursion_limit": 100})
     print("Final State:", result)
@@ -2,41 +2,70 @@
 Interactive Code Editor for Command Line
 Allows real-time editing of generated code when errors are detected
 """
+import hashlib
 import os
 import sys
-import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import re
 import json
 
+from agent.js_checker import get_node_checker
+
+# Hidden per-project folder for tool state; never validated or sent to the LLM
+STATE_DIR_NAME = ".app_builder"
+VALIDATION_CACHE_FILE = "validation_cache.json"
+VALIDATION_CACHE_VERSION = 1
+
 
 class InteractiveCodeEditor:
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, use_validation_cache: bool = True):
         self.project_root = Path(project_root)
+        self.use_validation_cache = use_validation_cache
         self.current_file = None
         self.current_content = []
         self.errors = []
         
     def detect_errors(self) -> List[Dict[str, str]]:
-        """Detect errors in the generated project"""
-        errors = []
-        
-        # Check for HTML files and validate them
-        html_files = list(self.project_root.glob("**/*.html"))
-        for html_file in html_files:
-            errors.extend(self._validate_html(html_file))
-        
-        # Check for CSS files and validate them
-        css_files = list(self.project_root.glob("**/*.css"))
-        for css_file in css_files:
-            errors.extend(self._validate_css(css_file))
-        
-        # Check for JS files and validate them
-        js_files = list(self.project_root.glob("**/*.js"))
-        for js_file in js_files:
-            errors.extend(self._validate_js(js_file))
+        """Detect errors in the generated project, re-validating only files whose content changed"""
+        files_by_type = self._collect_files()
+        all_files = [path for paths in files_by_type.values() for path in paths]
+        
+        # Reuse results for files whose content hash matches the cached one
+        cache = self._load_validation_cache()
+        keys = {path: self._validation_key(path) for path in all_files}
+        file_errors = {}
+        for path in all_files:
+            entry = cache.get(str(path.relative_to(self.project_root)))
+            if keys[path] and entry and entry['key'] == keys[path]:
+                file_errors[path] = entry['errors']
+        stale = {suffix: [p for p in paths if p not in file_errors] for suffix, paths in files_by_type.items()}
+        
+        # All JS files go to the Node.js checker in one request, which runs while
+        # the HTML and CSS checks do. Those are pure-Python regex work holding the
+        # GIL, so they run inline: more threads would not make them faster.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            js_check = pool.submit(self._check_js_files, stale['.js']) if stale['.js'] else None
+            for path in stale['.html']:
+                file_errors[path] = self._validate_html(path)
+            for path in stale['.css']:
+                file_errors[path] = self._validate_css(path)
+            js_errors, js_checker = js_check.result() if js_check else ([], None)
+        for path in stale['.js']:
+            relative = str(path.relative_to(self.project_root))
+            file_errors[path] = [e for e in js_errors if e['file'] == relative]
+            # Node may have timed out or crashed: key the result by the checker that produced it
+            keys[path] = self._validation_key(path, js_checker)
+        
+        self._save_validation_cache({
+            str(path.relative_to(self.project_root)): {'key': keys[path], 'errors': file_errors[path]}
+            for path in all_files if keys[path]
+        })
+        
+        # Keep the HTML, CSS, JS order of the report stable regardless of completion order
+        errors = [error for path in all_files for error in file_errors[path]]
             
         # Check for package.json and dependencies
         package_json = self.project_root / "package.json"
@@ -46,6 +75,56 @@ class InteractiveCodeEditor:
         self.errors = errors
         return errors
     
+    def _collect_files(self) -> Dict[str, List[Path]]:
+        """Walk the project tree once and bucket HTML, CSS and JS files by type"""
+        files_by_type = {'.html': [], '.css': [], '.js': []}
+        for dirpath, dirnames, filenames in os.walk(self.project_root):
+            dirnames[:] = sorted(d for d in dirnames if d != STATE_DIR_NAME)
+            for filename in sorted(filenames):
+                suffix = os.path.splitext(filename)[1].lower()
+                if suffix in files_by_type:
+                    files_by_type[suffix].append(Path(dirpath) / filename)
+        return files_by_type
+    
+    def _validation_key(self, path: Path, js_checker: Optional[str] = None) -> Optional[str]:
+        """
+        Content hash of a file; JS keys also name the checker ('node' or 'basic'),
+        by default the one that would check the file now
+        """
+        try:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        if path.suffix.lower() == '.js':
+            digest += ':' + (js_checker or ('node' if get_node_checker().available else 'basic'))
+        return digest
+    
+    def _load_validation_cache(self) -> Dict[str, Dict]:
+        """Load cached per-file validation results from the project folder"""
+        if not self.use_validation_cache:
+            return {}
+        cache_path = self.project_root / STATE_DIR_NAME / VALIDATION_CACHE_FILE
+        try:
+            data = json.loads(cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != VALIDATION_CACHE_VERSION:
+            return {}
+        return data.get('files', {})
+    
+    def _save_validation_cache(self, files: Dict[str, Dict]):
+        """Atomically write per-file validation results to the project folder"""
+        if not self.use_validation_cache or not self.project_root.is_dir():
+            return
+        state_dir = self.project_root / STATE_DIR_NAME
+        try:
+            state_dir.mkdir(exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=state_dir, suffix='.tmp', delete=False, encoding='utf-8') as tmp:
+                json.dump({'version': VALIDATION_CACHE_VERSION, 'files': files}, tmp)
+            os.replace(tmp.name, state_dir / VALIDATION_CACHE_FILE)
+        except OSError:
+            pass  # The cache is an optimisation; detection results are still returned
+    
     def _validate_html(self, html_file: Path) -> List[Dict[str, str]]:
         """Validate HTML file for basic syntax errors"""
         errors = []
@@ -134,84 +213,80 @@ class InteractiveCodeEditor:
     
     def _validate_js(self, js_file: Path) -> List[Dict[str, str]]:
         """Validate JavaScript file using Node.js syntax check"""
-        errors = []
-        try:
-            content = js_file.read_text(encoding='utf-8')
-            
-            # Create a temporary file for validation
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as temp_file:
-                temp_file.write(content)
-                temp_file_path = temp_file.name
-            
+        return self._validate_js_files([js_file])
+    
+    def _validate_js_files(self, js_files: List[Path]) -> List[Dict[str, str]]:
+        """Validate JavaScript files with a single request to the persistent Node.js checker"""
+        return self._check_js_files(js_files)[0]
+    
+    def _check_js_files(self, js_files: List[Path]) -> Tuple[List[Dict[str, str]], str]:
+        """_validate_js_files, also returning the checker used: 'node', or 'basic' when Node.js was unusable"""
+        file_errors = {js_file: [] for js_file in js_files}
+        sources = {}
+        for js_file in js_files:
             try:
-                # Try to parse JS with Node.js
-                result = subprocess.run(
-                    ['node', '-c', temp_file_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if result.returncode != 0:
-                    error_lines = result.stderr.split('\n')
-                    for error_line in error_lines:
-                        if error_line.strip():
-                            # Parse error line to extract line number if possible
-                            line_match = re.search(r':(\d+):', error_line)
-                            line_num = int(line_match.group(1)) if line_match else 1
-                            
-                            errors.append({
-                                'file': str(js_file.relative_to(self.project_root)),
-                                'line': line_num,
-                                'type': 'JavaScript',
-                                'message': error_line.strip()
-                            })
-                            
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+                sources[js_file] = js_file.read_text(encoding='utf-8')
+            except Exception as e:
+                file_errors[js_file].append({
+                    'file': str(js_file.relative_to(self.project_root)),
+                    'line': 1,
+                    'type': 'JavaScript',
+                    'message': f'File error: {str(e)}'
+                })
+        
+        results = get_node_checker().check(
+            [(str(js_file.relative_to(self.project_root)), content) for js_file, content in sources.items()]
+        )
+        
+        for i, (js_file, content) in enumerate(sources.items()):
+            if results is None:
                 # If Node.js is not available, do basic syntax checks
-                lines = content.split('\n')
-                paren_count = 0
-                brace_count = 0
-                bracket_count = 0
-                
-                for i, line in enumerate(lines, 1):
-                    paren_count += line.count('(') - line.count(')')
-                    brace_count += line.count('{') - line.count('}')
-                    bracket_count += line.count('[') - line.count(']')
-                    
-                    if paren_count < 0:
-                        errors.append({
-                            'file': str(js_file.relative_to(self.project_root)),
-                            'line': i,
-                            'type': 'JavaScript',
-                            'message': 'Unexpected closing parenthesis )'
-                        })
-                    if brace_count < 0:
-                        errors.append({
-                            'file': str(js_file.relative_to(self.project_root)),
-                            'line': i,
-                            'type': 'JavaScript',
-                            'message': 'Unexpected closing brace }'
-                        })
-                    if bracket_count < 0:
-                        errors.append({
-                            'file': str(js_file.relative_to(self.project_root)),
-                            'line': i,
-                            'type': 'JavaScript',
-                            'message': 'Unexpected closing bracket ]'
-                        })
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                
-        except Exception as e:
-            errors.append({
-                'file': str(js_file.relative_to(self.project_root)),
-                'line': 1,
-                'type': 'JavaScript',
-                'message': f'File error: {str(e)}'
-            })
+                file_errors[js_file].extend(self._basic_js_checks(js_file, content))
+            elif results[i]:
+                file_errors[js_file].append({
+                    'file': str(js_file.relative_to(self.project_root)),
+                    'line': results[i]['line'],
+                    'type': 'JavaScript',
+                    'message': results[i]['message']
+                })
+        
+        errors = [error for js_file in js_files for error in file_errors[js_file]]
+        return errors, 'basic' if results is None else 'node'
+    
+    def _basic_js_checks(self, js_file: Path, content: str) -> List[Dict[str, str]]:
+        """Bracket-balance checks used when Node.js is unavailable"""
+        errors = []
+        lines = content.split('\n')
+        paren_count = 0
+        brace_count = 0
+        bracket_count = 0
+        
+        for i, line in enumerate(lines, 1):
+            paren_count += line.count('(') - line.count(')')
+            brace_count += line.count('{') - line.count('}')
+            bracket_count += line.count('[') - line.count(']')
+            
+            if paren_count < 0:
+                errors.append({
+                    'file': str(js_file.relative_to(self.project_root)),
+                    'line': i,
+                    'type': 'JavaScript',
+                    'message': 'Unexpected closing parenthesis )'
+                })
+            if brace_count < 0:
+                errors.append({
+                    'file': str(js_file.relative_to(self.project_root)),
+                    'line': i,
+                    'type': 'JavaScript',
+                    'message': 'Unexpected closing brace }'
+                })
+            if bracket_count < 0:
+                errors.append({
+                    'file': str(js_file.relative_to(self.project_root)),
+                    'line': i,
+                    'type': 'JavaScript',
+                    'message': 'Unexpected closing bracket ]'
+                })
         
         return errors
     
@@ -0,0 +1,162 @@
+"""
+Persistent Node.js Syntax Checker
+Keeps one long-lived node process that parses JavaScript sources sent over stdin
+"""
+import atexit
+import json
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Compiles each source the way `node -c` does for a CommonJS file: wrapped in
+# the module function, so a top-level `return` is legal but `import` is not.
+_CHECKER_SCRIPT = r"""
+const vm = require('vm');
+const readline = require('readline');
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+const PARAMS = ['exports', 'require', 'module', '__filename', '__dirname'];
+
+rl.on('line', (line) => {
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (e) {
+    process.stdout.write(JSON.stringify({ error: 'bad request: ' + e.message }) + '\n');
+    return;
+  }
+  const results = request.files.map(({ name, source }) => {
+    try {
+      vm.compileFunction(source, PARAMS, { filename: name });
+      return null;
+    } catch (e) {
+      const match = /^.*?:(\d+)\r?\n/.exec(String(e.stack));
+      return { line: match ? Number(match[1]) : 1, message: `${e.name}: ${e.message}` };
+    }
+  });
+  process.stdout.write(JSON.stringify({ id: request.id, results }) + '\n');
+});
+"""
+
+DEFAULT_TIMEOUT = 10
+
+
+class NodeSyntaxChecker:
+    """
+    Long-lived `node` process that syntax-checks many JS sources per request.
+
+    Requests and responses are single JSON lines over stdin/stdout, so no temp
+    files are written and node starts once per process instead of once per file.
+    `check` returns None when node is missing or stops responding; callers
+    then fall back to their own checks.
+    """
+
+    def __init__(self, node_path: str = "node", timeout: float = DEFAULT_TIMEOUT):
+        self.node_path = node_path
+        self.timeout = timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._unavailable = shutil.which(node_path) is None
+
+    @property
+    def available(self) -> bool:
+        return not self._unavailable
+
+    def _start(self) -> bool:
+        try:
+            self._process = subprocess.Popen(
+                [self.node_path, "-e", _CHECKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+        except OSError:
+            self._unavailable = True
+            return False
+
+        # A reader thread keeps readline timeouts portable (select() on pipes is POSIX-only)
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_responses, args=(self._process, self._responses),
+                         daemon=True).start()
+        return True
+
+    @staticmethod
+    def _read_responses(process: subprocess.Popen, responses: queue.Queue):
+        for line in process.stdout:
+            responses.put(line)
+        responses.put(None)  # EOF: process exited
+
+    def check(self, sources: List[Tuple[str, str]]) -> Optional[List[Optional[Dict]]]:
+        """
+        Syntax-check (name, source) pairs in one round trip.
+
+        Returns one entry per source: None when it parses, otherwise a dict
+        with 'line' and 'message'. Returns None if node could not be used.
+        """
+        if not sources:
+            return []
+        if self._unavailable:
+            return None
+
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                if not self._start():
+                    return None
+
+            self._next_id += 1
+            request = {"id": self._next_id,
+                       "files": [{"name": name, "source": source} for name, source in sources]}
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                while True:
+                    line = self._responses.get(timeout=self.timeout)
+                    if line is None:
+                        raise EOFError("node checker exited")
+                    response = json.loads(line)
+                    if response.get("id") == self._next_id:
+                        return response["results"]
+            except (OSError, ValueError, EOFError, queue.Empty):
+                # Hung or crashed worker: drop it, the next call starts a fresh one
+                self._stop()
+                return None
+
+    def _stop(self):
+        if self._process is not None:
+            try:
+                self._process.kill()
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self._process = None
+
+    def close(self):
+        """Shut down the node process."""
+        with self._lock:
+            if self._process is not None:
+                try:
+                    self._process.stdin.close()
+                    self._process.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self._stop()
+
+
+_checker: Optional[NodeSyntaxChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_node_checker() -> NodeSyntaxChecker:
+    """Return the process-wide checker, started lazily on first use."""
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = NodeSyntaxChecker()
+            atexit.register(_checker.close)
+        return _checker
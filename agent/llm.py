@@ -0,0 +1,134 @@
+"""
+LLM Client Registry
+One lazily constructed Gemini chat client per configuration, shared by every agent,
+with one rate limiter and adaptive concurrency limit per model (see agent.rate_limit)
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from agent.rate_limit import ModelGate
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+DEFAULT_TEMPERATURE = 0.1
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MODEL_CONCURRENCY = 8
+# "gemini": live calls; "record": live calls, saved to the recording; "replay": served
+# from the recording (scripted on a miss); "scripted": canned responses (see agent.replay)
+LLM_BACKENDS = ("gemini", "record", "replay", "scripted")
+
+_clients: Dict[Tuple[str, float], object] = {}
+_clients_lock = threading.Lock()
+
+
+def llm_backend() -> str:
+    """The backend selected by LLM_BACKEND (default gemini)."""
+    backend = os.getenv("LLM_BACKEND", "gemini").lower()
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}'. Expected one of: {', '.join(LLM_BACKENDS)}")
+    return backend
+
+
+def needs_api_key() -> bool:
+    """False when LLM_BACKEND serves responses offline, so no GOOGLE_API_KEY is required."""
+    return os.getenv("LLM_BACKEND", "gemini").lower() in ("gemini", "record")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for Gemini quota / 429 errors that are worth retrying after a pause"""
+    try:
+        from google.api_core.exceptions import ResourceExhausted
+    except ImportError:  # pragma: no cover - google-api-core ships with langchain-google-genai
+        ResourceExhausted = None
+    if ResourceExhausted is not None and isinstance(error, ResourceExhausted):
+        return True
+    message = str(error).upper()
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "RATE LIMIT" in message
+
+
+_gates: Dict[str, ModelGate] = {}
+_model_overrides: Dict[str, Dict[str, float]] = {}
+_gates_lock = threading.Lock()
+
+
+def _model_name(model: str) -> str:
+    return model[len("models/"):] if model.startswith("models/") else model
+
+
+def _model_setting(model: str, name: str, per_model_env: str, env: str, default: float) -> float:
+    """
+    One limit for a model: configure_model(), then the per-model variable
+    ("gemini-2.0-flash=8,gemini-1.5-pro=2"), then the process-wide one, then the default.
+    """
+    if name in _model_overrides.get(model, {}):
+        return _model_overrides[model][name]
+    for entry in os.getenv(per_model_env, "").split(","):
+        entry_model, _, value = entry.partition("=")
+        if entry_model.strip() == model and value.strip():
+            return float(value)
+    return float(os.getenv(env, default))
+
+
+def get_gate(model: str) -> ModelGate:
+    """Return the process-wide gate for a model, creating it on first use."""
+    model = _model_name(model)
+    with _gates_lock:
+        gate = _gates.get(model)
+        if gate is None:
+            gate = _gates[model] = ModelGate(
+                max_concurrency=int(_model_setting(model, "concurrency", "LLM_MODEL_CONCURRENCY",
+                                                   "LLM_MAX_CONCURRENCY", DEFAULT_MODEL_CONCURRENCY)),
+                rpm=_model_setting(model, "rpm", "LLM_MODEL_RPM", "LLM_RPM", 0),
+                tpm=_model_setting(model, "tpm", "LLM_MODEL_TPM", "LLM_TPM", 0),
+            )
+        return gate
+
+
+def configure_model(model: str, concurrency: Optional[int] = None,
+                    rpm: Optional[float] = None, tpm: Optional[float] = None):
+    """
+    Override a model's limits: the concurrency ceiling for the AIMD controller,
+    and requests/tokens per minute (0 = unlimited). Resets the model's gate.
+    """
+    model = _model_name(model)
+    settings = {"concurrency": concurrency, "rpm": rpm, "tpm": tpm}
+    with _gates_lock:
+        _model_overrides.setdefault(model, {}).update({k: v for k, v in settings.items() if v is not None})
+        _gates.pop(model, None)
+
+
+def get_llm(model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE):
+    """
+    Return the shared chat client for (model, temperature), building it on first use.
+
+    Every client shares one transport (a single keep-alive gRPC channel) and the
+    model's gate, so concurrent builds reuse warm connections and share one
+    requests/min, tokens/min and concurrency budget.
+    langchain_google_genai is only imported here, so commands that never call
+    Gemini (listing apps, --help, validation) don't pay for it.
+
+    LLM_BACKEND=record|replay|scripted swaps in the offline stand-in from
+    agent.replay, for runs without an API key or network.
+    """
+    key = (model, temperature)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            backend = llm_backend()
+            if backend != "gemini":
+                from agent.replay import build_replay_model
+
+                client = _clients[key] = build_replay_model(backend, model, temperature)
+                return client
+
+            from agent.llm_cache import get_llm_cache
+            from agent.pooled_llm import PooledChatGoogleGenerativeAI
+
+            client = PooledChatGoogleGenerativeAI(
+                model=model,
+                temperature=temperature,
+                pool_retries=DEFAULT_MAX_RETRIES,
+                cache=get_llm_cache()
+            )
+            _clients[key] = client
+        return client
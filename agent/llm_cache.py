@@ -0,0 +1,209 @@
+"""
+Persistent LLM Response Cache
+Content-addressed on-disk cache for Gemini responses with LRU eviction
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_MB = 200
+
+# a request that names the tool the model must call (with_structured_output)
+_FORCED_TOOL_CALL = re.compile(r"\('tool_choice', (?!None\))")
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_settings(llm_string: str) -> tuple:
+    """Extract (model, temperature) from a LangChain llm_string, if present."""
+    try:
+        serialized = json.loads(llm_string.split("---", 1)[0])
+        kwargs = serialized.get("kwargs", {})
+        return kwargs.get("model", ""), kwargs.get("temperature")
+    except (ValueError, AttributeError):
+        return "", None
+
+
+def _failed_tool_call(llm_string: str, return_val: RETURN_VAL_TYPE) -> bool:
+    """
+    True when a request that forces a tool call (structured output) got back a
+    generation without a valid one, i.e. a response the output parser rejects.
+    """
+    if not _FORCED_TOOL_CALL.search(llm_string.rsplit("---", 1)[-1]):
+        return False
+    for generation in return_val:
+        message = getattr(generation, "message", None)
+        if message is None or getattr(message, "invalid_tool_calls", None) or not getattr(message, "tool_calls", None):
+            return True
+    return False
+
+
+class PersistentLLMCache(BaseCache):
+    """
+    SQLite-backed LangChain cache shared by every agent that talks to Gemini.
+
+    Entries are keyed by a hash of the model configuration (model name,
+    temperature, bound tools/structured-output schema) and a hash of the
+    prompt, so structured-output calls are cached like plain text calls.
+    When the cache grows past ``max_entries`` or ``max_bytes`` the least
+    recently used entries are evicted.
+    Structured-output responses without a usable tool call are not stored, so
+    a malformed answer is retried on the next run instead of replayed.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = Path(cache_dir) / "responses.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       model TEXT,
+                       temperature REAL,
+                       prompt_hash TEXT,
+                       value TEXT NOT NULL,
+                       size INTEGER NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_access REAL NOT NULL,
+                       hits INTEGER NOT NULL DEFAULT 0
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return _hash(f"{_hash(llm_string)}:{_hash(prompt)}")
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                    (time.time(), key),
+                )
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # langchain_core.load.loads is flagged as beta
+                generations = loads(row[0])
+        except Exception:
+            # Entry written by an incompatible LangChain version; treat as a miss
+            return None
+        if _failed_tool_call(llm_string, generations):
+            # Stored before failed tool calls were skipped; drop it and ask again
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _failed_tool_call(llm_string, return_val):
+            return
+        value = dumps(list(return_val))
+        model, temperature = _model_settings(llm_string)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, model, temperature, prompt_hash, value, size, created_at, last_access, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)""",
+                (self._key(prompt, llm_string), model, temperature, _hash(prompt),
+                 value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both limits are respected."""
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, total size and cumulative hits."""
+        with self._lock:
+            count, total, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "hits": hits, "path": str(self.path)}
+
+
+_cache: Optional[PersistentLLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[PersistentLLMCache]:
+    """
+    Return the process-wide response cache, or None when disabled.
+
+    Configured through LLM_CACHE (set to 0/off/false to disable), LLM_CACHE_DIR,
+    LLM_CACHE_MAX_ENTRIES and LLM_CACHE_MAX_MB.
+    """
+    global _cache
+    if os.getenv("LLM_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = PersistentLLMCache(
+                cache_dir=os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+            )
+        return _cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or clear the LLM response cache')
+    parser.add_argument('--clear', action='store_true', help='Delete every cached response')
+    args = parser.parse_args()
+
+    cache = get_llm_cache()
+    if cache is None:
+        print("LLM cache is disabled (LLM_CACHE=off)")
+    elif args.clear:
+        cache.clear()
+        print(f"🧹 Cleared {cache.path}")
+    else:
+        stats = cache.stats()
+        print(f"📦 {stats['path']}: {stats['entries']} entries, {stats['bytes']} bytes, {stats['hits']} hits")
@@ -0,0 +1,284 @@
+"""
+Run Metrics
+Per-node and per-LLM-call timing, token usage, retries and cache hits for one build
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from agent.interactive_editor import STATE_DIR_NAME
+
+REPORT_FILE = "run_report.json"
+PROMETHEUS_FILE = "run_metrics.prom"
+# run_name prefix of the ReAct invocation behind each coder step
+STEP_RUN_PREFIX = "coder_step:"
+NO_NODE = "(none)"
+
+
+def _usage(response: LLMResult) -> Dict[str, Any]:
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None and getattr(message, "usage_metadata", None):
+                return dict(message.usage_metadata)
+    token_usage = (response.llm_output or {}).get("usage_metadata") or {}
+    return dict(token_usage)
+
+
+def merge_reports(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One report for a build that ran in several attempts (a failed run and its
+    resumes): totals, per-node figures, steps and LLM calls of every attempt,
+    with the status of the latest. Each attempt is listed under "attempts".
+    """
+    attempts = previous.get("attempts") or [{key: previous[key] for key in ("started_at", "duration_s", "status")}]
+    nodes = {name: dict(totals) for name, totals in previous["nodes"].items()}
+    for name, totals in current["nodes"].items():
+        merged = nodes.setdefault(name, dict.fromkeys(totals, 0))
+        for key, value in totals.items():
+            merged[key] += value
+        merged["duration_s"] = round(merged["duration_s"], 3)
+    return {
+        "started_at": previous["started_at"],
+        "duration_s": round(previous["duration_s"] + current["duration_s"], 3),
+        "status": current["status"],
+        "attempts": attempts + [{key: current[key] for key in ("started_at", "duration_s", "status")}],
+        "totals": {key: round(previous["totals"][key] + value, 3) for key, value in current["totals"].items()},
+        "nodes": nodes,
+        "steps": previous["steps"] + current["steps"],
+        "llm_calls": previous["llm_calls"] + current["llm_calls"],
+    }
+
+
+def _prometheus_text(report: Dict[str, Any]) -> str:
+    lines = [
+        "# HELP app_builder_build_duration_seconds Wall time of the build",
+        "# TYPE app_builder_build_duration_seconds gauge",
+        f"app_builder_build_duration_seconds {report['duration_s']}",
+    ]
+    metrics = [
+        ("node_runs_total", "Times each graph node ran", "runs"),
+        ("node_duration_seconds", "Wall time spent in each graph node", "duration_s"),
+        ("llm_calls_total", "LLM calls made under each graph node", "llm_calls"),
+        ("llm_cache_hits_total", "LLM calls answered from the response cache", "cache_hits"),
+        ("llm_retries_total", "Failed LLM attempts under each graph node", "retries"),
+    ]
+    for name, help_text, key in metrics:
+        lines += [f"# HELP app_builder_{name} {help_text}", f"# TYPE app_builder_{name} counter"]
+        lines += [f'app_builder_{name}{{node="{node}"}} {totals[key]}'
+                  for node, totals in report["nodes"].items()]
+    lines += ["# HELP app_builder_llm_tokens_total Tokens used under each graph node",
+              "# TYPE app_builder_llm_tokens_total counter"]
+    for node, totals in report["nodes"].items():
+        lines.append(f'app_builder_llm_tokens_total{{node="{node}",direction="input"}} {totals["input_tokens"]}')
+        lines.append(f'app_builder_llm_tokens_total{{node="{node}",direction="output"}} {totals["output_tokens"]}')
+    return "\n".join(lines) + "\n"
+
+
+class RunMetrics(BaseCallbackHandler):
+    """
+    Callback handler that measures one build.
+
+    Pass it in the `callbacks` of agent.invoke/ainvoke. Graph nodes are the
+    direct children of the graph run; coder steps are the runs named
+    STEP_RUN_PREFIX + filepath. Every LLM call is attributed to the node and
+    step it ran under, so nested agents (the ReAct coder, the auto-debugger
+    tool) are counted against the node that started them.
+
+    Cache hits are recognised by LangChain zeroing total_cost on cached
+    responses; they count no tokens. Retries are LLM calls that failed
+    (timeouts, exhausted rate-limit retries in the shared client), each of
+    which the caller retries or gives up on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._root: Optional[UUID] = None
+        self.started_at = time.time()
+        self._started_perf = time.perf_counter()
+        self.nodes: List[Dict[str, Any]] = []
+        self.steps: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+
+    # -- run tree -------------------------------------------------------
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: Optional[str], **extra):
+        with self._lock:
+            kind = "run"
+            if parent_run_id is None and self._root is None:
+                self._root = run_id
+                kind = "graph"
+            elif parent_run_id is not None and parent_run_id == self._root and not (name or "").startswith("__"):
+                kind = "node"
+            elif name and name.startswith(STEP_RUN_PREFIX):
+                kind = "step"
+            self._runs[run_id] = {"parent": parent_run_id, "name": name or "", "kind": kind,
+                                  "start": time.perf_counter(), "llm_calls": 0, "input_tokens": 0,
+                                  "output_tokens": 0, "cache_hits": 0, "retries": 0, **extra}
+
+    def _ancestor(self, run_id: Optional[UUID], kind: str) -> Optional[Dict[str, Any]]:
+        while run_id is not None and run_id in self._runs:
+            run = self._runs[run_id]
+            if run["kind"] == kind:
+                return run
+            run_id = run["parent"]
+        return None
+
+    def _finish(self, run_id: UUID, error: bool = False):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None or run["kind"] not in ("node", "step"):
+                return
+            record = {
+                "name": run["name"][len(STEP_RUN_PREFIX):] if run["kind"] == "step" else run["name"],
+                "duration_s": round(time.perf_counter() - run["start"], 3),
+                "llm_calls": run["llm_calls"],
+                "input_tokens": run["input_tokens"],
+                "output_tokens": run["output_tokens"],
+                "cache_hits": run["cache_hits"],
+                "retries": run["retries"],
+                "error": error,
+            }
+            if run["kind"] == "node":
+                self.nodes.append(record)
+            else:
+                node = self._ancestor(run["parent"], "node")
+                record["node"] = node["name"] if node else NO_NODE
+                self.steps.append(record)
+
+    def _record_llm(self, run_id: UUID, usage: Dict[str, Any], error: Optional[BaseException] = None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            cache_hit = error is None and usage.get("total_cost") == 0
+            input_tokens = 0 if cache_hit else usage.get("input_tokens", 0)
+            output_tokens = 0 if cache_hit else usage.get("output_tokens", 0)
+            node = self._ancestor(run["parent"], "node")
+            step = self._ancestor(run["parent"], "step")
+            self.llm_calls.append({
+                "node": node["name"] if node else NO_NODE,
+                "step": step["name"][len(STEP_RUN_PREFIX):] if step else None,
+                "model": run.get("model", ""),
+                "duration_s": round(time.perf_counter() - run["start"], 3),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_hit": cache_hit,
+                "error": type(error).__name__ if error else None,
+            })
+            for owner in (node, step):
+                if owner is None:
+                    continue
+                owner["llm_calls"] += 1
+                owner["input_tokens"] += input_tokens
+                owner["output_tokens"] += output_tokens
+                owner["cache_hits"] += int(cache_hit)
+                owner["retries"] += int(error is not None)
+
+    # -- callbacks ------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or (serialized or {}).get("name"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or (serialized or {}).get("name"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or (metadata or {}).get("ls_model_name", "")
+        self._start(run_id, parent_run_id, kwargs.get("name"), model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or (metadata or {}).get("ls_model_name", "")
+        self._start(run_id, parent_run_id, kwargs.get("name"), model=model)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        self._record_llm(run_id, _usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._record_llm(run_id, {}, error=error)
+
+    # -- reports --------------------------------------------------------
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per node name, in first-run order."""
+        with self._lock:
+            nodes: Dict[str, Dict[str, Any]] = {}
+            for record in self.nodes:
+                totals = nodes.setdefault(record["name"], {"runs": 0, "duration_s": 0.0, "llm_calls": 0,
+                                                           "input_tokens": 0, "output_tokens": 0,
+                                                           "cache_hits": 0, "retries": 0})
+                totals["runs"] += 1
+                for key in ("duration_s", "llm_calls", "input_tokens", "output_tokens", "cache_hits", "retries"):
+                    totals[key] += record[key]
+            for totals in nodes.values():
+                totals["duration_s"] = round(totals["duration_s"], 3)
+            return nodes
+
+    def report(self, status: str = "completed") -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.llm_calls)
+            steps = list(self.steps)
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_s": round(time.perf_counter() - self._started_perf, 3),
+            "status": status,
+            "totals": {
+                "llm_calls": len(calls),
+                "input_tokens": sum(c["input_tokens"] for c in calls),
+                "output_tokens": sum(c["output_tokens"] for c in calls),
+                "cache_hits": sum(1 for c in calls if c["cache_hit"]),
+                "retries": sum(1 for c in calls if c["error"]),
+                "llm_time_s": round(sum(c["duration_s"] for c in calls), 3),
+            },
+            "nodes": self.summary(),
+            "steps": steps,
+            "llm_calls": calls,
+        }
+
+    def to_prometheus(self, status: str = "completed") -> str:
+        """Render the report in the Prometheus text exposition format."""
+        return _prometheus_text(self.report(status))
+
+    def write_report(self, project_root, status: str = "completed", prometheus: bool = False,
+                     resumed: bool = False) -> Path:
+        """
+        Write run_report.json (and optionally run_metrics.prom) into the project's state directory.
+
+        With resumed=True this run continues an earlier one, and its figures are
+        merged into the report already there (see merge_reports).
+        """
+        state_dir = Path(project_root) / STATE_DIR_NAME
+        state_dir.mkdir(parents=True, exist_ok=True)
+        path = state_dir / REPORT_FILE
+        report = self.report(status)
+        if resumed:
+            try:
+                report = merge_reports(json.loads(path.read_text(encoding="utf-8")), report)
+            except (OSError, ValueError, KeyError):
+                pass  # no readable report from the earlier run; this run's figures stand alone
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        if prometheus:
+            (state_dir / PROMETHEUS_FILE).write_text(_prometheus_text(report), encoding="utf-8")
+        return path
@@ -0,0 +1,76 @@
+"""
+Line-Range Patching
+Applies small line-range edits from Gemini instead of rewriting whole files
+"""
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from agent.states import LineEdit
+
+# "patch" asks the model for line-range edits and falls back to a full rewrite
+# when they don't apply; "rewrite" always asks for the complete file
+FIX_MODES = ("patch", "rewrite")
+
+
+class PatchConflict(ValueError):
+    """Raised when an edit does not match the file it is applied to"""
+
+
+def number_lines(content: str, start: int = 1) -> str:
+    """Prefix each line with its 1-based number so the model can cite line ranges."""
+    lines = content.splitlines()
+    width = len(str(start + len(lines) - 1))
+    return "\n".join(f"{i:>{width}} | {line}" for i, line in enumerate(lines, start))
+
+
+def _same(a: List[str], b: List[str]) -> bool:
+    return len(a) == len(b) and all(x.rstrip() == y.rstrip() for x, y in zip(a, b))
+
+
+def _locate(lines: List[str], edit: "LineEdit") -> Tuple[int, int]:
+    """Return the 0-based [start, end) slice an edit replaces, or raise PatchConflict."""
+    expected = edit.original_text.splitlines()
+    if not expected:
+        # Pure insertion before start_line (len(lines) + 1 appends)
+        if not 1 <= edit.start_line <= len(lines) + 1:
+            raise PatchConflict(f"insertion point {edit.start_line} is outside the file")
+        return edit.start_line - 1, edit.start_line - 1
+
+    start = edit.start_line - 1
+    if 0 <= start and _same(lines[start:start + len(expected)], expected):
+        return start, start + len(expected)
+
+    # Line numbers drifted: accept the original text only if it occurs exactly once
+    matches = [i for i in range(len(lines) - len(expected) + 1)
+               if _same(lines[i:i + len(expected)], expected)]
+    if len(matches) != 1:
+        reason = "not found" if not matches else f"ambiguous ({len(matches)} matches)"
+        raise PatchConflict(f"lines {edit.start_line}-{edit.end_line}: original text {reason}")
+    return matches[0], matches[0] + len(expected)
+
+
+def apply_line_edits(content: str, edits: List["LineEdit"]) -> str:
+    """
+    Apply line-range edits to content and return the new text.
+
+    Every edit is checked against its original_text before anything changes;
+    a mismatch, an ambiguous match or overlapping edits raise PatchConflict
+    so the caller can fall back to a full rewrite.
+    """
+    lines = content.splitlines()
+    spans = sorted((_locate(lines, edit) + (edit,) for edit in edits), key=lambda s: (s[0], s[1]))
+
+    previous_end: Optional[int] = None
+    for start, end, _ in spans:
+        if previous_end is not None and start < previous_end:
+            raise PatchConflict(f"overlapping edits around line {start + 1}")
+        previous_end = end
+
+    # Apply bottom-up so earlier spans keep their positions
+    for start, end, edit in reversed(spans):
+        lines[start:end] = edit.new_text.splitlines()
+
+    patched = "\n".join(lines)
+    if content.endswith("\n") and lines:
+        patched += "\n"
+    return patched
@@ -0,0 +1,221 @@
+"""
+Plan Cache
+Validated Plan/TaskPlan pairs of the predefined apps, so a rebuild can skip the planner and architect
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from agent.llm import DEFAULT_MODEL
+from agent.prompts import architect_prompt, planner_prompt
+from agent.states import Plan, TaskPlan
+
+DEFAULT_PLAN_CACHE_DIR = ".plan_cache"
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def plan_prompt_hash(user_prompt: str, model: str = DEFAULT_MODEL) -> str:
+    """
+    Hash of everything the planner and architect are given apart from the plan
+    itself: the app prompt, both prompt templates and the model. Editing any of
+    them makes earlier plans unreachable.
+    """
+    return _hash("\n".join([model, planner_prompt(user_prompt), architect_prompt(plan="")]))
+
+
+def validate_plans(plan: Plan, task_plan: TaskPlan):
+    """Raise ValueError unless task_plan can drive the coder on its own."""
+    steps = task_plan.implementation_steps
+    if not plan.files or not steps:
+        raise ValueError("plan has no files or no implementation steps")
+    paths = {step.filepath for step in steps}
+    for step in steps:
+        if not step.filepath.strip():
+            raise ValueError("implementation step without a filepath")
+        unknown = set(step.depends_on) - paths
+        if unknown:
+            raise ValueError(f"{step.filepath} depends on files no step writes: {', '.join(sorted(unknown))}")
+
+
+class PlanCache:
+    """
+    SQLite store of the plans of builds that finished without errors.
+
+    Entries are keyed by app spec name and plan_prompt_hash. An entry is
+    served for at most max_age seconds after it was stored; it is dropped
+    early when a build that used it ends with errors, and on demand with
+    `python -m agent.plan_cache --invalidate`.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_PLAN_CACHE_DIR,
+                 max_age: float = DEFAULT_MAX_AGE_DAYS * 86400):
+        self.path = Path(cache_dir) / "plans.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS plans (
+                       spec TEXT NOT NULL,
+                       prompt_hash TEXT NOT NULL,
+                       plan TEXT NOT NULL,
+                       task_plan TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_used REAL,
+                       hits INTEGER NOT NULL DEFAULT 0,
+                       PRIMARY KEY (spec, prompt_hash)
+                   )"""
+            )
+
+    def get(self, spec: str, user_prompt: str) -> Optional[Tuple[Plan, TaskPlan, float]]:
+        """The fresh cached (plan, task_plan, created_at) for spec and prompt, or None."""
+        key = (spec, plan_prompt_hash(user_prompt))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan, task_plan, created_at FROM plans WHERE spec = ? AND prompt_hash = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[2] > self.max_age:
+            self.discard(spec, user_prompt)
+            return None
+        try:
+            plan, task_plan = Plan.model_validate_json(row[0]), TaskPlan.model_validate_json(row[1])
+            validate_plans(plan, task_plan)
+        except (ValidationError, ValueError):
+            # Written before a schema change; treat as a miss
+            self.discard(spec, user_prompt)
+            return None
+
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE plans SET last_used = ?, hits = hits + 1 WHERE spec = ? AND prompt_hash = ?",
+                               (time.time(), *key))
+        task_plan.plan = plan
+        return plan, task_plan, row[2]
+
+    def put(self, spec: str, user_prompt: str, plan: Plan, task_plan: TaskPlan):
+        validate_plans(plan, task_plan)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO plans (spec, prompt_hash, plan, task_plan, created_at, hits)
+                   VALUES (?, ?, ?, ?, ?, 0)""",
+                (spec, plan_prompt_hash(user_prompt), plan.model_dump_json(),
+                 task_plan.model_dump_json(exclude={"plan"}), time.time()),
+            )
+
+    def discard(self, spec: str, user_prompt: str):
+        """Drop the plan cached for this spec and prompt."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM plans WHERE spec = ? AND prompt_hash = ?",
+                               (spec, plan_prompt_hash(user_prompt)))
+
+    def invalidate(self, spec: Optional[str] = None) -> int:
+        """Drop the plans of one spec, or all plans; returns how many were dropped."""
+        with self._lock, self._conn:
+            if spec is None:
+                return self._conn.execute("DELETE FROM plans").rowcount
+            return self._conn.execute("DELETE FROM plans WHERE spec = ?", (spec,)).rowcount
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT spec, prompt_hash, created_at, hits FROM plans ORDER BY spec, created_at DESC"
+            ).fetchall()
+        now = time.time()
+        return [{"spec": spec, "prompt_hash": prompt_hash, "age_s": now - created_at, "hits": hits,
+                 "fresh": now - created_at <= self.max_age}
+                for spec, prompt_hash, created_at, hits in rows]
+
+
+_cache: Optional[PlanCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """
+    Return the process-wide plan cache, or None when disabled (PLAN_CACHE=off).
+
+    Configured with PLAN_CACHE_DIR and PLAN_CACHE_MAX_AGE_DAYS.
+    """
+    global _cache
+    if os.getenv("PLAN_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = PlanCache(
+                cache_dir=os.getenv("PLAN_CACHE_DIR", DEFAULT_PLAN_CACHE_DIR),
+                max_age=float(os.getenv("PLAN_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS)) * 86400,
+            )
+        return _cache
+
+
+def cached_plans(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Initial-state additions for a build with a plan_cache_key: the cached plan
+    and task_plan, which make the graph start at the coder. Empty on a miss.
+    """
+    spec = state.get("plan_cache_key")
+    cache = get_plan_cache() if spec and "task_plan" not in state else None
+    cached = cache.get(spec, state["user_prompt"]) if cache else None
+    if cached is None:
+        return {}
+    plan, task_plan, created_at = cached
+    print(f"📦 Reusing the cached plan for {spec} ({(time.time() - created_at) / 3600:.1f}h old), "
+          f"skipping planner and architect")
+    return {"plan": plan, "task_plan": task_plan, "plan_from_cache": True}
+
+
+def remember_plans(result: Dict[str, Any]):
+    """
+    After a build with a plan_cache_key: store its plans if it ended without
+    errors, or drop the cached plans it used if it did not.
+    """
+    spec = result.get("plan_cache_key")
+    cache = get_plan_cache() if spec else None
+    if cache is None or not result.get("task_plan"):
+        return
+    if result.get("has_errors"):
+        if result.get("plan_from_cache"):
+            cache.discard(spec, result["user_prompt"])
+            print(f"🗑️ Dropped the cached plan for {spec}: the build ended with errors")
+    elif not result.get("plan_from_cache"):
+        try:
+            cache.put(spec, result["user_prompt"], result["plan"], result["task_plan"])
+        except ValueError as e:
+            print(f"⚠️ Plan for {spec} not cached: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the cached app plans')
+    parser.add_argument('--invalidate', metavar='APP', nargs='*',
+                        help='Drop the cached plans of these apps (all apps when none are named)')
+    args = parser.parse_args()
+
+    cache = get_plan_cache()
+    if cache is None:
+        print("Plan cache is disabled (PLAN_CACHE=off)")
+    elif args.invalidate is not None:
+        dropped = sum(cache.invalidate(app.lower()) for app in args.invalidate) if args.invalidate \
+            else cache.invalidate()
+        print(f"🧹 Dropped {dropped} cached plan(s)")
+    else:
+        entries = cache.entries()
+        if not entries:
+            print(f"📦 {cache.path}: no cached plans")
+        for entry in entries:
+            print(f"📦 {entry['spec']:<12} {entry['prompt_hash'][:12]}  {entry['age_s'] / 3600:6.1f}h old  "
+                  f"{entry['hits']} hit(s){'' if entry['fresh'] else '  (stale)'}")
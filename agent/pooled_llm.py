@@ -0,0 +1,133 @@
+"""
+Pooled Gemini Client
+ChatGoogleGenerativeAI routed through the shared transport and per-model gates of agent.llm
+"""
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple
+
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import model_validator
+
+from agent.context_packer import estimate_tokens
+from agent.llm import DEFAULT_MAX_RETRIES, get_gate, is_rate_limit_error
+
+_transports: Dict[Tuple[Any, ...], Any] = {}
+_transports_lock = threading.Lock()
+
+
+def _used_tokens(generations) -> int:
+    """Total tokens Gemini reported for a result's generations or a stream's chunks."""
+    total = 0
+    for generation in generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        total += usage.get("total_tokens", 0)
+    return total
+
+
+class PooledChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """
+    Gemini chat model that shares its connection and its rate-limit state.
+
+    All instances with the same credentials reuse one generative service
+    client, i.e. one long-lived gRPC channel multiplexing every request.
+    Each request is admitted by the model's gate (see agent.rate_limit.ModelGate)
+    with an estimate of its input tokens, settled against the reported usage
+    afterwards; rate-limit errors are retried here, up to pool_retries attempts,
+    after the gate's shared backoff. The library's own per-call retry is
+    switched off so the two don't compound. Cache hits never reach _generate and take no slot.
+    """
+
+    max_retries: int = 1
+    pool_retries: int = DEFAULT_MAX_RETRIES
+
+    @model_validator(mode="after")
+    def _share_transport(self):
+        api_key = self.google_api_key.get_secret_value() if self.google_api_key else None
+        key = (api_key, id(self.credentials) if self.credentials else None,
+               self.transport, repr(self.client_options))
+        with _transports_lock:
+            self.client = _transports.setdefault(key, self.client)
+        return self
+
+    def _estimate_tokens(self, messages) -> int:
+        return sum(estimate_tokens(str(message.content)) for message in messages)
+
+    def _retry_sync(self, call, messages, **kwargs):
+        gate = get_gate(self.model)
+        tokens = self._estimate_tokens(messages)
+        for attempt in range(self.pool_retries):
+            with gate.slot(tokens) as permit:
+                try:
+                    result = call(messages, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.pool_retries - 1:
+                        raise
+                    delay = gate.record_rate_limit(permit)
+                    print(f"⏳ Gemini rate limit hit, retrying in {delay:.1f}s...")
+                    continue
+            gate.record_success(permit, _used_tokens(result.generations))
+            return result
+
+    async def _retry_async(self, call, messages, **kwargs):
+        gate = get_gate(self.model)
+        tokens = self._estimate_tokens(messages)
+        for attempt in range(self.pool_retries):
+            async with gate.aslot(tokens) as permit:
+                try:
+                    result = await call(messages, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.pool_retries - 1:
+                        raise
+                    delay = gate.record_rate_limit(permit)
+                    print(f"⏳ Gemini rate limit hit, retrying in {delay:.1f}s...")
+                    continue
+            gate.record_success(permit, _used_tokens(result.generations))
+            return result
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self._retry_sync(super()._generate, messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return await self._retry_async(super()._agenerate, messages, stop=stop,
+                                       run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # A stream is only retried before its first chunk; after that the caller has seen output
+        gate = get_gate(self.model)
+        tokens = self._estimate_tokens(messages)
+        for attempt in range(self.pool_retries):
+            chunks = []
+            with gate.slot(tokens) as permit:
+                try:
+                    for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                        chunks.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    if chunks or not is_rate_limit_error(e) or attempt == self.pool_retries - 1:
+                        raise
+                    delay = gate.record_rate_limit(permit)
+                    print(f"⏳ Gemini rate limit hit, retrying in {delay:.1f}s...")
+                    continue
+            gate.record_success(permit, _used_tokens(chunks))
+            return
+
+    async def _astream(self, messages, stop=None, run_manager=None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        gate = get_gate(self.model)
+        tokens = self._estimate_tokens(messages)
+        for attempt in range(self.pool_retries):
+            chunks = []
+            async with gate.aslot(tokens) as permit:
+                try:
+                    async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                        chunks.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    if chunks or not is_rate_limit_error(e) or attempt == self.pool_retries - 1:
+                        raise
+                    delay = gate.record_rate_limit(permit)
+                    print(f"⏳ Gemini rate limit hit, retrying in {delay:.1f}s...")
+                    continue
+            gate.record_success(permit, _used_tokens(chunks))
+            return
@@ -50,6 +50,7 @@ For each implementation step, specify:
 - EXACT filepath (generated_project/filename.ext)
 - COMPLETE task description with specific code requirements
 - Dependencies and integration points
+- depends_on: filepaths of EARLIER steps this file must read (e.g. script.js reading element ids from index.html); leave empty for independent files so they can be coded in parallel
 - Expected function signatures and data structures
 - Modern best practices to follow
 
@@ -61,6 +62,18 @@ REMEMBER: Generate tasks that create modern, working, error-free code.
     return ARCHITECT_PROMPT
 
 
+def architect_stream_prompt(plan: str) -> str:
+    """architect_prompt asking for the steps as JSON lines, so they can be coded as they stream in."""
+    return architect_prompt(plan) + """
+OUTPUT FORMAT:
+Reply with the implementation steps only, one JSON object per line, in the order they should be built.
+No prose, no numbering, no code fences. Filepaths follow the EXACT filepath rule above. Lines look like:
+{"filepath": "generated_project/index.html", "task_description": "...", "depends_on": []}
+{"filepath": "generated_project/script.js", "task_description": "...", "depends_on": ["generated_project/index.html"]}
+A step's depends_on may only name files of lines above it. Put steps that other files depend on first.
+    """
+
+
 def coder_system_prompt() -> str:
     CODER_SYSTEM_PROMPT = """
 You are the CODER agent - an expert developer who writes PERFECT, ERROR-FREE code.
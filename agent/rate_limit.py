@@ -0,0 +1,198 @@
+"""
+Rate Limiting
+Process-wide request and token budgets plus adaptive concurrency for Gemini calls
+"""
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+
+BACKOFF_BASE_DELAY = 2.0
+BACKOFF_MAX_DELAY = 60.0
+AIMD_INCREASE = 1.0
+AIMD_DECREASE = 0.5
+_ASYNC_POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """
+    Budget of `per_minute` units refilled continuously, holding at most one
+    minute's worth. reserve() always succeeds but may leave the bucket in debt;
+    the caller then waits until the debt is repaid, so callers are served in
+    reservation order. A per_minute of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self._level = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units and return the seconds to wait before spending them."""
+        if self.per_minute <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            # a request bigger than a minute's budget must still be able to run
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level * 60 / self.per_minute
+
+    def credit(self, amount: float):
+        """Return unused units (or take more, with a negative amount) after the fact."""
+        if self.per_minute <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Every success grows the limit by `increase / limit`, i.e. by about
+    `increase` per full window of requests; a rate-limit response multiplies it
+    by `decrease`. Requests that were already in flight when the limit was cut
+    don't cut it again, so one burst of 429s halves the limit once.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1,
+                 increase: float = AIMD_INCREASE, decrease: float = AIMD_DECREASE):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.increase = increase
+        self.decrease = decrease
+        self._limit = float(self.max_limit)
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def on_success(self):
+        with self._lock:
+            self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1.0))
+
+    def on_rate_limit(self, started: float) -> bool:
+        """Cut the limit for a request started at `started` (monotonic); False if already cut since."""
+        with self._lock:
+            if started < self._last_decrease:
+                return False
+            self._limit = max(self.min_limit, self._limit * self.decrease)
+            self._last_decrease = time.monotonic()
+            return True
+
+
+@dataclass
+class Permit:
+    """One admitted request: when it started and how many tokens it reserved."""
+    started: float
+    tokens: int
+
+
+class ModelGate:
+    """
+    Admission control for one model, shared by every caller in the process.
+
+    A request first waits out any shared backoff, then for its share of the
+    requests/min and tokens/min buckets, then for a concurrency slot under the
+    AIMD limit. Token reservations are estimates; record_success() settles
+    them against the usage Gemini reports. After a rate-limit error every
+    caller waits out the same exponential backoff (with jitter), which resets
+    on the next success, so concurrent builds slow down together.
+    """
+
+    def __init__(self, max_concurrency: int, rpm: float = 0, tpm: float = 0):
+        self.concurrency = AIMDController(max_concurrency)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        self._failures = 0
+        self._blocked_until = 0.0
+        self.in_flight = 0
+        self.rate_limited = 0
+
+    @property
+    def limit(self) -> int:
+        return self.concurrency.limit
+
+    def _backoff_seconds(self) -> float:
+        with self._cond:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+    def _budget_seconds(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def _try_enter(self) -> bool:
+        with self._cond:
+            if self.in_flight >= self.concurrency.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _exit(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        """Admit one request of about `tokens` input tokens; yields its Permit."""
+        while (delay := self._backoff_seconds()) > 0:
+            time.sleep(delay)
+        delay = self._budget_seconds(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        with self._cond:
+            # every exit notifies; the limit may have moved, so re-check on each wake-up
+            while self.in_flight >= self.concurrency.limit:
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield Permit(time.monotonic(), tokens)
+        finally:
+            self._exit()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int = 0):
+        """Async twin of slot(); polls so a cancelled task never holds a slot."""
+        import asyncio
+
+        while (delay := self._backoff_seconds()) > 0:
+            await asyncio.sleep(delay)
+        delay = self._budget_seconds(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        while not self._try_enter():
+            await asyncio.sleep(_ASYNC_POLL_INTERVAL)
+        try:
+            yield Permit(time.monotonic(), tokens)
+        finally:
+            self._exit()
+
+    def record_success(self, permit: Permit, used_tokens: int = 0):
+        """Settle the token reservation and let the concurrency limit grow."""
+        if used_tokens:
+            self.tokens.credit(permit.tokens - used_tokens)
+        self.concurrency.on_success()
+        with self._cond:
+            self._failures = 0
+
+    def record_rate_limit(self, permit: Permit) -> float:
+        """Cut concurrency, push out the shared backoff and return how long callers will now wait."""
+        self.concurrency.on_rate_limit(permit.started)
+        with self._cond:
+            self._failures += 1
+            self.rate_limited += 1
+            delay = min(BACKOFF_MAX_DELAY, BACKOFF_BASE_DELAY * 2 ** (self._failures - 1))
+            delay *= random.uniform(0.5, 1.0)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return self._blocked_until - time.monotonic()
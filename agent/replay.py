@@ -0,0 +1,309 @@
+"""
+LLM Record / Replay
+A stand-in chat model that records Gemini responses, replays them offline, or
+serves scripted responses, so builds run without an API key or network
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+DEFAULT_RECORDING = "llm_recording.jsonl"
+STREAM_CHUNK_CHARS = 64
+
+
+class ReplayMiss(LookupError):
+    """Raised in strict replay mode when a request has no recorded response"""
+
+
+def _tool_name(tool: Any) -> str:
+    if isinstance(tool, dict):
+        return tool.get("function", tool).get("name", "")
+    return getattr(tool, "name", None) or getattr(tool, "__name__", "") or type(tool).__name__
+
+
+def _message_key(message: BaseMessage, roots: List[str]) -> list:
+    # ids (message ids, tool call ids) and the build's project folder differ
+    # between runs, so they are left out of the key
+    content = json.dumps(message.content, default=str)
+    for root in roots:
+        content = content.replace(root, "<project_root>")
+    calls = [[c["name"], c["args"]] for c in getattr(message, "tool_calls", None) or []]
+    return [message.type, content, calls]
+
+
+def request_key(messages: List[BaseMessage], tools: Optional[list] = None, tool_choice: Any = None) -> str:
+    """Stable hash of a chat request: message texts and tool calls, bound tool names, tool choice."""
+    from agent.tools import get_project_root
+
+    root = get_project_root()
+    roots = sorted({json.dumps(str(p))[1:-1] for p in (root, root.resolve())}, key=len, reverse=True)
+    payload = [[_message_key(m, roots) for m in messages], sorted(_tool_name(t) for t in tools or []), str(tool_choice)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Recording:
+    """
+    JSON-lines file of recorded responses, keyed by request_key.
+
+    A key recorded more than once is replayed in recording order, then the
+    last response repeats, so nondeterministic runs replay faithfully.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        if self.path.exists():
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # langchain_core.load.loads is flagged as beta
+                for line in self.path.read_text(encoding="utf-8").splitlines():
+                    if line.strip():
+                        entry = json.loads(line)
+                        entry["message"] = loads(entry["message"])
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def append(self, key: str, message: AIMessage, duration_s: float, tools: List[str]):
+        entry = {"key": key, "tools": tools, "duration_s": round(duration_s, 3), "message": dumps(message)}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._entries.setdefault(key, []).append({**entry, "message": message})
+
+
+# -- scripted responses -------------------------------------------------------
+
+_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <link rel="stylesheet" href="style.css">
+</head>
+<body>
+    <main class="app">
+        <h1 id="title">{title}</h1>
+        <p id="output">Ready</p>
+        <button id="action" type="button">Run</button>
+    </main>
+    <script src="script.js"></script>
+</body>
+</html>
+"""
+_CSS = """:root {
+    --accent: #4f46e5;
+}
+
+.app {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    gap: 1rem;
+    padding: 2rem;
+}
+
+#action {
+    background: var(--accent);
+    color: #fff;
+    border: none;
+    border-radius: 0.5rem;
+    padding: 0.5rem 1rem;
+}
+"""
+_JS = """document.addEventListener('DOMContentLoaded', () => {
+    const output = document.getElementById('output');
+    const action = document.getElementById('action');
+    let count = 0;
+
+    action.addEventListener('click', () => {
+        count += 1;
+        output.textContent = `Clicked ${count} time(s)`;
+    });
+});
+"""
+_SCRIPTED_FILES = {"index.html": _HTML.format(title="Scripted App"), "style.css": _CSS, "script.js": _JS}
+_SCRIPTED_BY_SUFFIX = {Path(name).suffix: content for name, content in _SCRIPTED_FILES.items()}
+
+
+def _last_human_text(messages: List[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if message.type in ("human", "system") and isinstance(message.content, str):
+            return message.content
+    return ""
+
+
+def scripted_response(messages: List[BaseMessage], tool_names: List[str]) -> AIMessage:
+    """
+    A canned reply that keeps every node of the pipeline moving: a three-file
+    plan and task plan (also as JSON lines for the streaming architect), one
+    write_file per coder step, and no issues or edits from the debugger and
+    editor schemas. Anything else gets a short text reply.
+    """
+    def call(name: str, args: Dict[str, Any]) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}"}])
+
+    files = [{"path": name, "purpose": f"{name} of the app"} for name in _SCRIPTED_FILES]
+    steps = [
+        {"filepath": "index.html", "task_description": "Create the page markup"},
+        {"filepath": "style.css", "task_description": "Style the page"},
+        {"filepath": "script.js", "task_description": "Add the counter logic", "depends_on": ["index.html"]},
+    ]
+    if "Plan" in tool_names:
+        return call("Plan", {"name": "Scripted App", "description": "An offline scripted app",
+                             "techstack": "html, css, javascript", "features": ["button counter"],
+                             "files": files})
+    if "TaskPlan" in tool_names:
+        return call("TaskPlan", {"implementation_steps": steps})
+    if "write_file" in tool_names:
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content="File written.")
+        text = _last_human_text(messages)
+        path = text.split("File: ", 1)[1].split("\n", 1)[0].strip() if "File: " in text else "index.html"
+        return call("write_file", {"path": path, "content": _SCRIPTED_BY_SUFFIX.get(Path(path).suffix, "")})
+    if "FileAnalysis" in tool_names:
+        return call("FileAnalysis", {"issues": []})
+    if "FileReview" in tool_names:
+        return call("FileReview", {"issues": [], "fixed_content": ""})
+    if "FilePatch" in tool_names:
+        return call("FilePatch", {"file_path": "", "edits": []})
+    if "ProjectPatch" in tool_names:
+        return call("ProjectPatch", {"files": []})
+    if "one JSON object per line" in _last_human_text(messages):
+        return AIMessage(content="\n".join(json.dumps(step) for step in steps))
+    return AIMessage(content="OK")
+
+
+# -- chat model ---------------------------------------------------------------
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Local stand-in for the Gemini client, chosen with LLM_BACKEND.
+
+    record: every request goes to `delegate` (the live client) and the reply
+    is appended to the recording. replay: replies come from the recording,
+    falling back to scripted_response on a miss (ReplayMiss when strict).
+    scripted: scripted_response only. `latency` adds a fixed delay per call;
+    with `recorded_latency` replayed calls take as long as they did live.
+    """
+
+    model: str = "gemini-2.0-flash"
+    mode: str = "scripted"
+    recording_path: str = DEFAULT_RECORDING
+    latency: float = 0.0
+    recorded_latency: bool = False
+    strict: bool = False
+    delegate: Optional[BaseChatModel] = None
+    recording: Optional[Recording] = Field(default=None, exclude=True)
+    misses: int = 0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def model_post_init(self, __context: Any):
+        if self.mode in ("record", "replay") and self.recording is None:
+            self.recording = Recording(self.recording_path)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}-gemini"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "mode": self.mode}
+
+    def bind_tools(self, tools, *, tool_choice: Any = None, **kwargs: Any):
+        # OpenAI-style tool dicts: hashable into request keys, and accepted by Gemini's _generate
+        openai_tools = [t if isinstance(t, dict) else convert_to_openai_tool(t) for t in tools]
+        return self.bind(tools=openai_tools, tool_choice=tool_choice, **kwargs)
+
+    def _reply(self, messages: List[BaseMessage], tools: Optional[list], tool_choice: Any,
+               stop: Optional[List[str]], **kwargs: Any) -> AIMessage:
+        # tools/tool_choice make up the request key with the messages; any other
+        # call options (generation_config, safety_settings, ...) go to the live client as given
+        key = request_key(messages, tools, tool_choice)
+        names = [_tool_name(t) for t in tools or []]
+        if self.mode == "record":
+            started = time.perf_counter()
+            result = self.delegate._generate(messages, stop=stop, tools=tools or None, tool_choice=tool_choice,
+                                            **kwargs)
+            message = result.generations[0].message
+            self.recording.append(key, message, time.perf_counter() - started, names)
+            return message
+
+        entry = self.recording.lookup(key) if self.mode == "replay" else None
+        if entry is None and self.mode == "replay":
+            if self.strict:
+                raise ReplayMiss(f"No recorded response for request {key[:12]} (tools: {names or 'none'})")
+            self.misses += 1
+            print(f"⚠️ Replay miss {key[:12]}, using a scripted response", file=sys.stderr)
+        delay = entry["duration_s"] if entry and self.recorded_latency else self.latency
+        if delay:
+            time.sleep(delay)
+        return entry["message"] if entry else scripted_response(messages, names)
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, tool_choice=None,
+                  **kwargs: Any) -> ChatResult:
+        message = self._reply(messages, tools, tool_choice, stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, tools=None, tool_choice=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._reply(messages, tools, tool_choice, stop, **kwargs)
+        text = message.content if isinstance(message.content, str) else ""
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            chunk = AIMessageChunk(
+                content=piece,
+                tool_call_chunks=[{"name": c["name"], "args": json.dumps(c["args"]), "id": c.get("id"), "index": i}
+                                  for i, c in enumerate(message.tool_calls)] if last else [],
+                usage_metadata=message.usage_metadata if last else None,
+            )
+            if run_manager and piece:
+                run_manager.on_llm_new_token(piece, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+def build_replay_model(backend: str, model: str, temperature: float) -> ReplayChatModel:
+    """
+    The stand-in client for a non-gemini backend. LLM_RECORDING names the
+    recording file; LLM_FAKE_LATENCY is seconds per call, or "recorded" to
+    replay live timings; LLM_REPLAY_STRICT=1 makes replay misses fail.
+    """
+    latency = os.getenv("LLM_FAKE_LATENCY", "0")
+    options = dict(model=model, mode=backend, recording_path=os.getenv("LLM_RECORDING", DEFAULT_RECORDING),
+                   latency=0.0 if latency == "recorded" else float(latency),
+                   recorded_latency=latency == "recorded",
+                   strict=os.getenv("LLM_REPLAY_STRICT", "").lower() in ("1", "true", "yes"),
+                   cache=False)
+    if backend == "record":
+        from agent.pooled_llm import PooledChatGoogleGenerativeAI
+
+        options["delegate"] = PooledChatGoogleGenerativeAI(model=model, temperature=temperature)
+    return ReplayChatModel(**options)
@@ -0,0 +1,192 @@
+"""
+Build Runner
+Drives the compiled LangGraph workflow, one project folder per build
+"""
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from agent.checkpoints import BuildNotFound, get_checkpointer, new_thread_id, thread_config
+from agent.graph import agent
+from agent.metrics import RunMetrics
+from agent.plan_cache import cached_plans, remember_plans
+from agent.tools import reserve_project_folder, use_project_root
+
+DEFAULT_RECURSION_LIMIT = 100
+
+
+def _initial_state(user_prompt: str, project_root: Path, options: Dict[str, Any]) -> Dict[str, Any]:
+    state = {"user_prompt": user_prompt, "project_root": str(project_root)}
+    state.update(options)
+    state.update(cached_plans(state))
+    return state
+
+
+def _config(thread_id: str, recursion_limit: int, callbacks: Optional[list], metrics: RunMetrics) -> Dict[str, Any]:
+    return {**thread_config(thread_id), "recursion_limit": recursion_limit,
+            "callbacks": [*(callbacks or []), metrics]}
+
+
+def _check_resumable(snapshot, thread_id: str):
+    if get_checkpointer() is None:
+        raise BuildNotFound("Build checkpoints are disabled (BUILD_CHECKPOINTS=off)")
+    if not snapshot.values:
+        raise BuildNotFound(f"No checkpointed build with thread id {thread_id!r}")
+
+
+def run_build(user_prompt: str, project_root: Optional[str] = None,
+              recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+              callbacks: Optional[list] = None, prometheus: bool = False,
+              thread_id: Optional[str] = None, **options) -> Dict[str, Any]:
+    """
+    Build one app synchronously with agent.invoke.
+
+    Extra keyword arguments (use_auto_debug, parallel_coder, max_concurrency, ...)
+    are passed through as initial graph state; callbacks reach every LLM call.
+    With plan_cache_key (an app spec name) the build starts from a cached plan
+    when there is a fresh one, and a clean build's plan is cached for next time.
+    A run report (see agent.metrics) is written into the project's .app_builder
+    folder, plus Prometheus text when prometheus=True.
+    Each completed node is checkpointed under thread_id (a fresh id when not
+    given): if the build fails, resume_build(thread_id) picks it up from there.
+    The checkpoints of a build that completes are deleted.
+    """
+    root = Path(project_root) if project_root else reserve_project_folder()
+    thread_id = thread_id or new_thread_id()
+    metrics = RunMetrics()
+    status = "failed"
+    try:
+        with use_project_root(root):
+            result = agent.invoke(_initial_state(user_prompt, root, options),
+                                  _config(thread_id, recursion_limit, callbacks, metrics))
+        status = "completed"
+        remember_plans(result)
+        if get_checkpointer():
+            get_checkpointer().delete_thread(thread_id)
+        return result
+    finally:
+        metrics.write_report(root, status, prometheus=prometheus)
+
+
+def resume_build(thread_id: str, recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+                 callbacks: Optional[list] = None, prometheus: bool = False) -> Dict[str, Any]:
+    """
+    Continue a failed or interrupted build from its last checkpoint.
+
+    Nodes that completed (planner, architect, finished coder steps, ...) are not
+    run again; the build carries on in its original project folder, and this
+    run's metrics are merged into the run report of the earlier attempts.
+    """
+    config = thread_config(thread_id)
+    snapshot = agent.get_state(config) if get_checkpointer() else None
+    _check_resumable(snapshot, thread_id)
+    root = Path(snapshot.values["project_root"])
+    if not snapshot.next:
+        return snapshot.values
+
+    print(f"⏯️ Resuming build {thread_id} at {', '.join(snapshot.next)} in {root}")
+    metrics = RunMetrics()
+    status = "failed"
+    try:
+        with use_project_root(root):
+            result = agent.invoke(None, _config(thread_id, recursion_limit, callbacks, metrics))
+        status = "completed"
+        remember_plans(result)
+        get_checkpointer().delete_thread(thread_id)
+        return result
+    finally:
+        metrics.write_report(root, status, prometheus=prometheus, resumed=True)
+
+
+async def arun_build(user_prompt: str, project_root: Optional[str] = None,
+                     recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+                     callbacks: Optional[list] = None, prometheus: bool = False,
+                     thread_id: Optional[str] = None, **options) -> Dict[str, Any]:
+    """
+    Build one app with agent.ainvoke.
+
+    The build gets its own project folder; file tools resolve paths through a
+    context variable, so any number of builds can share one event loop.
+    Checkpointed like run_build; see aresume_build.
+    """
+    root = Path(project_root) if project_root else reserve_project_folder()
+    thread_id = thread_id or new_thread_id()
+    metrics = RunMetrics()
+    status = "failed"
+    try:
+        with use_project_root(root):
+            result = await agent.ainvoke(_initial_state(user_prompt, root, options),
+                                         _config(thread_id, recursion_limit, callbacks, metrics))
+        status = "completed"
+        remember_plans(result)
+        if get_checkpointer():
+            await get_checkpointer().adelete_thread(thread_id)
+        return result
+    finally:
+        metrics.write_report(root, status, prometheus=prometheus)
+
+
+async def aresume_build(thread_id: str, recursion_limit: int = DEFAULT_RECURSION_LIMIT,
+                        callbacks: Optional[list] = None, prometheus: bool = False) -> Dict[str, Any]:
+    """Async resume_build, with agent.ainvoke."""
+    config = thread_config(thread_id)
+    snapshot = await agent.aget_state(config) if get_checkpointer() else None
+    _check_resumable(snapshot, thread_id)
+    root = Path(snapshot.values["project_root"])
+    if not snapshot.next:
+        return snapshot.values
+
+    print(f"⏯️ Resuming build {thread_id} at {', '.join(snapshot.next)} in {root}")
+    metrics = RunMetrics()
+    status = "failed"
+    try:
+        with use_project_root(root):
+            result = await agent.ainvoke(None, _config(thread_id, recursion_limit, callbacks, metrics))
+        status = "completed"
+        remember_plans(result)
+        await get_checkpointer().adelete_thread(thread_id)
+        return result
+    finally:
+        metrics.write_report(root, status, prometheus=prometheus, resumed=True)
+
+
+async def arun_builds(user_prompts: List[str], max_concurrency: int = 8,
+                      **options) -> List[Any]:
+    """
+    Run many builds on the current event loop, at most max_concurrency at once.
+
+    Results come back in input order; a failed build yields its exception
+    instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(user_prompt: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await arun_build(user_prompt, **options)
+
+    return await asyncio.gather(*(run_one(p) for p in user_prompts), return_exceptions=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run several app builds concurrently on one event loop')
+    parser.add_argument('prompts', nargs='+', help='One prompt per app to build')
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='Maximum builds in flight at once (default: 8)')
+    parser.add_argument('--parallel-coder', action='store_true',
+                        help='Code independent files of each build concurrently')
+    parser.add_argument('--stream-architect', action='store_true',
+                        help='Code each step as soon as the architect streams it')
+    parser.add_argument('--prometheus', action='store_true',
+                        help='Also write run_metrics.prom next to each run report')
+    args = parser.parse_args()
+
+    results = asyncio.run(arun_builds(args.prompts, max_concurrency=args.max_concurrency,
+                                      parallel_coder=args.parallel_coder, stream_architect=args.stream_architect,
+                                      prometheus=args.prometheus))
+    for prompt, result in zip(args.prompts, results):
+        if isinstance(result, Exception):
+            print(f"❌ {prompt}: {result}")
+        else:
+            print(f"✅ {prompt}: {result['project_root']} ({result.get('status')})")
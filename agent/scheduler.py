@@ -0,0 +1,239 @@
+"""
+Dependency-aware scheduling for coder implementation steps
+Builds a DAG from a TaskPlan and runs independent steps on a bounded worker pool,
+for a whole plan or for steps that arrive one by one while the plan streams in
+"""
+import asyncio
+import contextvars
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Awaitable, Callable, List, Optional, Set, TypeVar
+
+from agent.states import ImplementationTask
+
+T = TypeVar("T")
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path.replace("\\", "/")).lstrip("/")
+
+
+def build_step_dependencies(steps: List[ImplementationTask]) -> List[Set[int]]:
+    """
+    Return, for each step, the indices of the earlier steps it must wait for.
+
+    A step depends on the previous step that touches the same file and on the
+    latest earlier step for every file listed in its ``depends_on``. Only
+    earlier steps are considered, so the result is always acyclic and never
+    reorders work relative to the sequential coder.
+    """
+    dependencies: List[Set[int]] = []
+    last_step_for_path = {}
+    last_step_for_name = {}
+
+    for idx, step in enumerate(steps):
+        deps = set()
+        path = _normalize(step.filepath)
+        if path in last_step_for_path:
+            deps.add(last_step_for_path[path])
+
+        for dep_path in step.depends_on:
+            dep = _normalize(dep_path)
+            if dep in last_step_for_path:
+                deps.add(last_step_for_path[dep])
+            elif posixpath.basename(dep) in last_step_for_name:
+                deps.add(last_step_for_name[posixpath.basename(dep)])
+
+        dependencies.append(deps)
+        last_step_for_path[path] = idx
+        last_step_for_name[posixpath.basename(path)] = idx
+
+    return dependencies
+
+
+def find_concurrent_steps(steps: List[ImplementationTask]) -> List[Set[int]]:
+    """
+    Return, for each step, the indices of steps that may run at the same time,
+    i.e. steps that are neither its ancestors nor its descendants in the DAG.
+    """
+    ancestors: List[Set[int]] = []
+    for deps in build_step_dependencies(steps):
+        closure = set(deps)
+        for dep in deps:
+            closure |= ancestors[dep]
+        ancestors.append(closure)
+
+    return [
+        {other for other in range(len(steps))
+         if other != idx and other not in ancestors[idx] and idx not in ancestors[other]}
+        for idx in range(len(steps))
+    ]
+
+
+def run_step_graph(steps: List[ImplementationTask],
+                   worker: Callable[[int, ImplementationTask], T],
+                   max_concurrency: int = 4) -> List[T]:
+    """
+    Run ``worker(idx, step)`` for every step, starting each one as soon as its
+    dependencies have finished. At most ``max_concurrency`` steps run at once.
+
+    Results are returned in plan order regardless of completion order. Each
+    worker runs in a copy of the caller's context so LangChain callbacks and
+    the active project root follow the step into its thread.
+    """
+    dependencies = build_step_dependencies(steps)
+    results: List[T] = [None] * len(steps)
+    done: Set[int] = set()
+    pending = list(range(len(steps)))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        running = {}
+        while pending or running:
+            ready = [idx for idx in pending if dependencies[idx] <= done]
+            for idx in ready:
+                ctx = contextvars.copy_context()
+                running[executor.submit(ctx.run, worker, idx, steps[idx])] = idx
+                pending.remove(idx)
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                idx = running.pop(future)
+                results[idx] = future.result()
+                done.add(idx)
+
+    return results
+
+
+async def run_step_graph_async(steps: List[ImplementationTask],
+                               worker: Callable[[int, ImplementationTask], Awaitable[T]],
+                               max_concurrency: int = 4) -> List[T]:
+    """
+    Async counterpart of run_step_graph: each step awaits its dependencies,
+    then runs ``await worker(idx, step)`` under a shared semaphore.
+    """
+    dependencies = build_step_dependencies(steps)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks: List[asyncio.Task] = []
+
+    async def run(idx: int) -> T:
+        if dependencies[idx]:
+            await asyncio.gather(*(tasks[dep] for dep in dependencies[idx]))
+        async with semaphore:
+            return await worker(idx, steps[idx])
+
+    # Dependencies always point at earlier steps, so their tasks already exist
+    for idx in range(len(steps)):
+        tasks.append(asyncio.create_task(run(idx)))
+
+    return list(await asyncio.gather(*tasks))
+
+
+class StepFeed:
+    """
+    run_step_graph for a plan that is still arriving.
+
+    add() each step as it is parsed; it starts on the worker pool as soon as
+    its dependencies among the steps added so far have finished (dependencies
+    only point at earlier steps, so later steps never change them). close()
+    waits for every step and returns the results in plan order, raising the
+    first worker error; after an error no further steps are started.
+    """
+
+    def __init__(self, worker: Callable[[int, ImplementationTask], T], max_concurrency: int = 4):
+        self.steps: List[ImplementationTask] = []
+        self._worker = worker
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+        # Reentrant: a future that is already done runs its callback inside submit()
+        self._cond = threading.Condition(threading.RLock())
+        self._dependencies: List[Set[int]] = []
+        self._contexts: List[contextvars.Context] = []
+        self._results: List[Optional[T]] = []
+        self._started: Set[int] = set()
+        self._done: Set[int] = set()
+        self._error: Optional[BaseException] = None
+
+    def add(self, step: ImplementationTask) -> int:
+        """Queue one step (run in a copy of the caller's context); returns its index."""
+        with self._cond:
+            self.steps.append(step)
+            self._dependencies.append(build_step_dependencies(self.steps)[-1])
+            self._contexts.append(contextvars.copy_context())
+            self._results.append(None)
+            self._start_ready()
+            return len(self.steps) - 1
+
+    def running_files(self, idx: int) -> List[str]:
+        """Files of the other steps running right now."""
+        with self._cond:
+            return sorted({self.steps[other].filepath for other in self._started - self._done if other != idx})
+
+    def _start_ready(self):
+        if self._error is not None:
+            return
+        for idx in range(len(self.steps)):
+            if idx not in self._started and self._dependencies[idx] <= self._done:
+                self._started.add(idx)
+                future = self._executor.submit(self._contexts[idx].run, self._worker, idx, self.steps[idx])
+                future.add_done_callback(lambda f, idx=idx: self._finished(idx, f))
+
+    def _finished(self, idx: int, future):
+        with self._cond:
+            if future.exception() is not None:
+                self._error = self._error or future.exception()
+            else:
+                self._results[idx] = future.result()
+            self._done.add(idx)
+            self._start_ready()
+            self._cond.notify_all()
+
+    def close(self) -> List[T]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._done == self._started
+                                and (self._error is not None or len(self._done) == len(self.steps)))
+        self._executor.shutdown()
+        if self._error is not None:
+            raise self._error
+        return list(self._results)
+
+
+class AsyncStepFeed:
+    """Async StepFeed: each added step becomes a task that awaits its dependencies."""
+
+    def __init__(self, worker: Callable[[int, ImplementationTask], Awaitable[T]], max_concurrency: int = 4):
+        self.steps: List[ImplementationTask] = []
+        self._worker = worker
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[int] = set()
+
+    def add(self, step: ImplementationTask) -> int:
+        """Queue one step; must be called on the event loop."""
+        self.steps.append(step)
+        idx = len(self.steps) - 1
+        self._tasks.append(asyncio.create_task(self._run(idx, build_step_dependencies(self.steps)[-1])))
+        return idx
+
+    def running_files(self, idx: int) -> List[str]:
+        return sorted({self.steps[other].filepath for other in self._running if other != idx})
+
+    async def _run(self, idx: int, dependencies: Set[int]) -> T:
+        if dependencies:
+            await asyncio.gather(*(self._tasks[dep] for dep in dependencies))
+        async with self._semaphore:
+            self._running.add(idx)
+            try:
+                return await self._worker(idx, self.steps[idx])
+            finally:
+                self._running.discard(idx)
+
+    async def close(self) -> List[T]:
+        """Wait for every step; on the first error the others are cancelled and awaited before it is raised."""
+        try:
+            return list(await asyncio.gather(*self._tasks))
+        except BaseException:
+            for task in self._tasks:
+                task.cancel()
+            # so no cancelled step is still writing files once the error propagates
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            raise
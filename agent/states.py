@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, TypedDict
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -17,6 +17,7 @@ class Plan(BaseModel):
 class ImplementationTask(BaseModel):
     filepath: str = Field(description="The path to the file to be modified")
     task_description: str = Field(description="A detailed description of the task to be performed on the file, e.g. 'add user authentication', 'implement data processing logic', etc.")
+    depends_on: list[str] = Field(default_factory=list, description="Filepaths of earlier steps whose output this step must read, e.g. ['generated_project/index.html'] for a script that queries its element ids")
 
 class TaskPlan(BaseModel):
     implementation_steps: list[ImplementationTask] = Field(description="A list of steps to be taken to implement the task")
@@ -25,4 +26,56 @@ class TaskPlan(BaseModel):
 class CoderState(BaseModel):
     task_plan: TaskPlan = Field(description="The plan for the task to be implemented")
     current_step_idx: int = Field(0, description="The index of the current step in the implementation steps")
-    current_file_content: Optional[str] = Field(None, description="The content of the file currently being edited or created")
\ No newline at end of file
+    current_file_content: Optional[str] = Field(None, description="The content of the file currently being edited or created")
+    step_results: list[str] = Field(default_factory=list, description="The final coder message for each completed step, in plan order")
+    file_summaries: dict[str, str] = Field(default_factory=dict, description="A one-line summary of each file written so far, by path")
+
+
+class IssueReport(BaseModel):
+    line_number: int = Field(description="The (approximate) 1-based line number of the issue")
+    issue_type: str = Field(description="The technology the issue belongs to, e.g. 'HTML', 'CSS', 'JavaScript', 'JSON'")
+    description: str = Field(description="A clear, one-sentence description of the problem")
+    severity: str = Field(description="One of 'critical' (syntax errors, broken functionality, security), 'warning' (quality issues, likely bugs, deprecated usage) or 'suggestion' (best practices, performance)")
+    suggested_fix: Optional[str] = Field(None, description="A short description of how to fix the issue")
+
+class FileAnalysis(BaseModel):
+    issues: list[IssueReport] = Field(description="Every real issue found in the file; empty if the file is correct")
+
+class FileReview(BaseModel):
+    issues: list[IssueReport] = Field(description="Every issue found in the file; empty if the file is correct")
+    fixed_content: str = Field(description="The COMPLETE corrected file content with all issues fixed, or an empty string if no changes are needed")
+
+class LineEdit(BaseModel):
+    start_line: int = Field(description="1-based number of the first line to replace; for a pure insertion, the line the new text goes before")
+    end_line: int = Field(description="1-based number of the last line to replace (inclusive); start_line - 1 for a pure insertion")
+    original_text: str = Field(description="The exact current text of lines start_line..end_line, without line-number prefixes; empty for a pure insertion")
+    new_text: str = Field(description="The replacement text for those lines; empty to delete them")
+
+class FilePatch(BaseModel):
+    file_path: str = Field("", description="The file the edits apply to, as named in the prompt")
+    edits: list[LineEdit] = Field(description="Non-overlapping line-range edits; only the lines that change")
+
+class ProjectPatch(BaseModel):
+    files: list[FilePatch] = Field(description="One entry per file that needs changes")
+
+class BuildState(TypedDict, total=False):
+    """LangGraph state for one build; keys persist across nodes until overwritten."""
+    user_prompt: str
+    project_root: str
+    use_auto_debug: bool
+    parallel_coder: bool
+    stream_architect: bool
+    max_concurrency: int
+    debug_mode: str
+    debug_max_llm_calls: Optional[int]
+    plan_cache_key: str
+    plan_from_cache: bool
+    plan: Plan
+    task_plan: TaskPlan
+    coder_state: CoderState
+    status: str
+    error_report: str
+    has_errors: bool
+    error_message: str
+    interactive_editing_done: bool
+    auto_debugging_done: bool
@@ -0,0 +1,195 @@
+"""
+Streaming Output Parsers
+Parse Gemini output while it streams so finished files can be written before the response ends
+"""
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+FileCallback = Callable[[str, str], None]
+TextCallback = Callable[[str], None]
+ObjectCallback = Callable[[Dict[str, Any]], None]
+
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed message chunk (Gemini may send a list of content parts)."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return content or ""
+
+
+def stream_text(llm: "BaseChatModel", prompt: str, on_text: TextCallback) -> str:
+    """
+    Stream a plain-text completion, passing each piece to on_text; returns the full text.
+
+    Streaming goes around LangChain's response cache, so callers make it opt-in.
+    """
+    parts: List[str] = []
+    for chunk in llm.stream(prompt):
+        text = chunk_text(chunk)
+        if text:
+            parts.append(text)
+            on_text(text)
+    return "".join(parts)
+
+
+async def astream_text(llm: "BaseChatModel", prompt: str, on_text: TextCallback) -> str:
+    """Async stream_text."""
+    parts: List[str] = []
+    async for chunk in llm.astream(prompt):
+        text = chunk_text(chunk)
+        if text:
+            parts.append(text)
+            on_text(text)
+    return "".join(parts)
+
+
+def strip_code_fences(text: str) -> str:
+    """Drop a leading ```lang line and a trailing ``` line from a model reply."""
+    text = text.strip()
+    if text.startswith('```'):
+        lines = text.split('\n')
+        if lines[0].startswith('```'):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == '```':
+            lines = lines[:-1]
+        text = '\n'.join(lines)
+    return text
+
+
+class FileBlockStream:
+    """
+    Incremental parser for replies framed as "=== filename ===" blocks.
+
+    Feed it text as it arrives; on_file(name, content) fires as soon as a
+    block is complete (when the next header starts, or at close()).
+    """
+
+    def __init__(self, on_file: Optional[FileCallback] = None):
+        self.on_file = on_file
+        self.files: Dict[str, str] = {}
+        self._buffer = ""
+        self._current_file: Optional[str] = None
+        self._current_content: List[str] = []
+
+    def feed(self, text: str):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> Dict[str, str]:
+        """Finish the last block and return every parsed file."""
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        self._finish_block()
+        return self.files
+
+    def _line(self, line: str):
+        if line.startswith('=== ') and line.endswith(' ==='):
+            self._finish_block()
+            self._current_file = line[4:-4].strip()
+        elif self._current_file:
+            self._current_content.append(line)
+
+    def _finish_block(self):
+        if self._current_file and self._current_content:
+            content = '\n'.join(self._current_content).strip()
+            self.files[self._current_file] = content
+            if self.on_file:
+                self.on_file(self._current_file, content)
+        self._current_file = None
+        self._current_content = []
+
+
+class CodeFenceStream:
+    """
+    Pass-through for a single streamed file that hides the surrounding code fence.
+
+    on_text receives the code as it arrives, minus a leading ```lang line; the
+    last line is held back until more text follows, so a closing ``` is never
+    shown. close() flushes the rest and returns the same text strip_code_fences gives.
+    """
+
+    def __init__(self, on_text: TextCallback):
+        self._on_text = on_text
+        self._parts: List[str] = []
+        self._emitted: List[str] = []
+        self._pending = ""
+        self._started = False
+
+    def on_text(self, text: str):
+        self._emitted.append(text)
+        self._on_text(text)
+
+    def feed(self, text: str):
+        self._parts.append(text)
+        self._pending += text
+        if not self._started:
+            if '\n' not in self._pending:
+                return
+            first, self._pending = self._pending.split('\n', 1)
+            self._started = True
+            if not first.strip().startswith('```'):
+                self.on_text(first + '\n')
+        cut = self._pending.rfind('\n')
+        if cut > 0:
+            # Hold the last complete line too: it may be the closing fence
+            held_from = self._pending.rfind('\n', 0, cut) + 1
+            if held_from:
+                self.on_text(self._pending[:held_from])
+                self._pending = self._pending[held_from:]
+
+    def close(self) -> str:
+        text = strip_code_fences("".join(self._parts))
+        emitted = "".join(self._emitted)
+        if text.startswith(emitted) and len(text) > len(emitted):
+            self.on_text(text[len(emitted):])
+        return text
+
+
+class JsonLineStream:
+    """
+    Incremental parser for replies with one JSON object per line.
+
+    on_object(obj) fires as soon as a line is complete. Blank lines, code
+    fences and lines that aren't a JSON object are skipped and kept in
+    `skipped`, so a stray sentence doesn't lose the rest of the reply.
+    """
+
+    def __init__(self, on_object: ObjectCallback):
+        self.on_object = on_object
+        self.objects: List[Dict[str, Any]] = []
+        self.skipped: List[str] = []
+        self._buffer = ""
+
+    def feed(self, text: str):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Parse the last line and return every object."""
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        return self.objects
+
+    def _line(self, line: str):
+        line = line.strip().rstrip(',')
+        if not line or line.startswith('```'):
+            return
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict):
+            self.skipped.append(line)
+            return
+        self.objects.append(obj)
+        self.on_object(obj)
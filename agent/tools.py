@@ -1,9 +1,12 @@
+import asyncio
+import contextvars
 import pathlib
 import subprocess
+from contextlib import contextmanager
 from typing import Tuple, Optional
 
 from langchain_core.tools import tool
-from agent.interactive_editor import InteractiveCodeEditor, start_interactive_editing_session
+from agent.interactive_editor import InteractiveCodeEditor, STATE_DIR_NAME, start_interactive_editing_session
 from agent.auto_debugger import auto_debug_project
 
 def get_next_project_folder() -> pathlib.Path:
@@ -18,13 +21,45 @@ def get_next_project_folder() -> pathlib.Path:
             return project_folder
         project_num += 1
 
+
+def reserve_project_folder() -> pathlib.Path:
+    """Create and return the next free project folder, safe against concurrent builds."""
+    while True:
+        project_folder = get_next_project_folder()
+        try:
+            project_folder.mkdir(parents=True)
+            return project_folder
+        except FileExistsError:
+            continue
+
 # Initialize PROJECT_ROOT with the next available project folder
 PROJECT_ROOT = get_next_project_folder()
 
+# Per-build override of PROJECT_ROOT; contextvars keep concurrent builds apart
+_active_project_root: contextvars.ContextVar[Optional[pathlib.Path]] = contextvars.ContextVar(
+    "active_project_root", default=None
+)
+
+
+def get_project_root() -> pathlib.Path:
+    """Returns the project root of the current build (PROJECT_ROOT unless overridden)."""
+    return _active_project_root.get() or PROJECT_ROOT
+
+
+@contextmanager
+def use_project_root(project_root):
+    """Route all file tools to project_root for the duration of the block."""
+    token = _active_project_root.set(pathlib.Path(project_root))
+    try:
+        yield
+    finally:
+        _active_project_root.reset(token)
+
 
 def safe_path_for_project(path: str) -> pathlib.Path:
-    p = (PROJECT_ROOT / path).resolve()
-    if PROJECT_ROOT.resolve() not in p.parents and PROJECT_ROOT.resolve() != p.parent and PROJECT_ROOT.resolve() != p:
+    root = get_project_root().resolve()
+    p = (root / path).resolve()
+    if root not in p.parents and root != p.parent and root != p:
         raise ValueError("Attempt to write outside project root")
     return p
 
@@ -178,7 +213,7 @@ def read_file(path: str) -> str:
 @tool
 def get_current_directory() -> str:
     """Returns the current working directory."""
-    return str(PROJECT_ROOT)
+    return str(get_project_root())
 
 
 @tool
@@ -187,26 +222,27 @@ def list_files(directory: str = ".") -> str:
     p = safe_path_for_project(directory)
     if not p.is_dir():
         return f"ERROR: {p} is not a directory"
-    files = [str(f.relative_to(PROJECT_ROOT)) for f in p.glob("**/*") if f.is_file()]
+    files = [str(f.relative_to(get_project_root())) for f in p.glob("**/*")
+             if f.is_file() and STATE_DIR_NAME not in f.relative_to(get_project_root()).parts]
     return "\n".join(files) if files else "No files found."
 
 @tool
 def run_cmd(cmd: str, cwd: Optional[str] = None, timeout: int = 30) -> Tuple[int, str, str]:
     """Runs a shell command in the specified directory and returns the result."""
-    cwd_dir = safe_path_for_project(cwd) if cwd else PROJECT_ROOT
+    cwd_dir = safe_path_for_project(cwd) if cwd else get_project_root()
     res = subprocess.run(cmd, shell=True, cwd=str(cwd_dir), capture_output=True, text=True, timeout=timeout)
     return res.returncode, res.stdout, res.stderr
 
 
 def init_project_root():
-    PROJECT_ROOT.mkdir(parents=True, exist_ok=True)
-    return str(PROJECT_ROOT)
+    get_project_root().mkdir(parents=True, exist_ok=True)
+    return str(get_project_root())
 
 
 @tool
 def detect_project_errors() -> str:
     """Detect errors in the generated project files (HTML, CSS, JavaScript, JSON)."""
-    editor = InteractiveCodeEditor(str(PROJECT_ROOT))
+    editor = InteractiveCodeEditor(str(get_project_root()))
     errors = editor.detect_errors()
     
     if not errors:
@@ -225,17 +261,17 @@ def start_interactive_editor(file_path: str = "") -> str:
     """Start interactive code editor for fixing errors. If file_path is provided, edit that specific file."""
     try:
         target_file = file_path if file_path else None
-        start_interactive_editing_session(str(PROJECT_ROOT), target_file)
+        start_interactive_editing_session(str(get_project_root()), target_file)
         return "✅ Interactive editing session completed!"
     except Exception as e:
         return f"❌ Error starting interactive editor: {str(e)}"
 
 
 @tool
-def auto_debug_with_gemini() -> str:
-    """Automatically analyze and fix all code issues using Gemini AI."""
+def auto_debug_with_gemini(mode: str = "two_phase", max_llm_calls: Optional[int] = None) -> str:
+    """Automatically analyze and fix code issues using Gemini AI. mode is 'two_phase' or 'single_pass'; max_llm_calls caps Gemini calls."""
     try:
-        results = auto_debug_project(str(PROJECT_ROOT))
+        results = auto_debug_project(str(get_project_root()), mode=mode, max_llm_calls=max_llm_calls)
         
         summary = f"""🤖 Gemini Auto-Debug Results:
         
@@ -264,8 +300,8 @@ Overall Status: {results['overall_status'].upper()}"""
 @tool
 def validate_file(file_path: str) -> str:
     """Validate a specific file for errors."""
-    editor = InteractiveCodeEditor(str(PROJECT_ROOT))
-    target_file = PROJECT_ROOT / file_path
+    editor = InteractiveCodeEditor(str(get_project_root()))
+    target_file = get_project_root() / file_path
     
     if not target_file.exists():
         return f"❌ File {file_path} not found!"
@@ -293,3 +329,46 @@ def validate_file(file_path: str) -> str:
             
     except Exception as e:
         return f"❌ Error validating file: {str(e)}"
+
+
+# ---------------------------------------------------------------------------
+# Async variants used by agent.ainvoke. Small local file operations run inline
+# on the event loop; validation (node subprocesses) and the Gemini debugger are
+# blocking, so they are pushed to a worker thread with the caller's context.
+# ---------------------------------------------------------------------------
+
+async def _awrite_file(path: str, content: str) -> str:
+    return write_file.func(path, content)
+
+
+async def _aread_file(path: str) -> str:
+    return read_file.func(path)
+
+
+async def _aget_current_directory() -> str:
+    return get_current_directory.func()
+
+
+async def _alist_files(directory: str = ".") -> str:
+    return list_files.func(directory)
+
+
+async def _adetect_project_errors() -> str:
+    return await asyncio.to_thread(detect_project_errors.func)
+
+
+async def _aauto_debug_with_gemini(mode: str = "two_phase", max_llm_calls: Optional[int] = None) -> str:
+    return await asyncio.to_thread(auto_debug_with_gemini.func, mode, max_llm_calls)
+
+
+async def _astart_interactive_editor(file_path: str = "") -> str:
+    return await asyncio.to_thread(start_interactive_editor.func, file_path)
+
+
+write_file.coroutine = _awrite_file
+read_file.coroutine = _aread_file
+get_current_directory.coroutine = _aget_current_directory
+list_files.coroutine = _alist_files
+detect_project_errors.coroutine = _adetect_project_errors
+auto_debug_with_gemini.coroutine = _aauto_debug_with_gemini
+start_interactive_editor.coroutine = _astart_interactive_editor
@@ -0,0 +1,223 @@
+"""
+Tracing
+Process-wide tracing of graph runs at a configurable level, to the console or a JSON-lines file
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.tracers.context import register_configure_hook
+from pydantic import BaseModel
+
+# off: no tracing hook at all; summary: one event per node and LLM call (timings,
+# token counts, no payloads); full: every chain, tool and LLM event with inputs/outputs
+TRACE_LEVELS = ("off", "summary", "full")
+DEFAULT_TRACE_LEVEL = "summary"
+
+
+def _jsonable(obj: Any) -> Any:
+    if isinstance(obj, BaseMessage):
+        return {"type": obj.type, "content": obj.content,
+                "tool_calls": getattr(obj, "tool_calls", None) or None}
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+class JsonlSink:
+    """Appends one JSON object per event to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, event: Dict[str, Any]):
+        line = json.dumps(event, default=_jsonable)
+        with self._lock:
+            if self._file.closed:  # replaced by reconfigure while this event was in flight
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def writes_to(self, path: str) -> bool:
+        return os.path.abspath(self.path) == os.path.abspath(path)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ConsoleSink:
+    """Writes compact node/run lines to stderr; at level full, every event as JSON."""
+
+    def __init__(self, full: bool = False):
+        self.full = full
+
+    def emit(self, event: Dict[str, Any]):
+        if self.full:
+            print(json.dumps(event, default=_jsonable), file=sys.stderr)
+        elif event["event"] == "node_end":
+            print(f"[trace] {event['node']} {event['status']} in {event['duration_s']}s", file=sys.stderr)
+        elif event["event"] == "run_end":
+            print(f"[trace] run {event['status']} in {event['duration_s']}s", file=sys.stderr)
+
+    def close(self):
+        pass
+
+
+class TraceHandler(BaseCallbackHandler):
+    """
+    Callback handler that emits trace events for sampled runs.
+
+    Sampling is decided once per root run, so a traced build is traced
+    completely. Graph nodes are the direct children of the root run.
+    """
+
+    def __init__(self, level: str, sink, sample_rate: float = 1.0):
+        self.level = level
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def reconfigure(self, level: str, sink, sample_rate: float):
+        """Switch level, sink and sample rate; the previous sink is closed unless it is reused."""
+        with self._lock:
+            previous = self.sink
+            self.level, self.sink, self.sample_rate = level, sink, sample_rate
+        if previous is not sink:
+            previous.close()
+
+    # -- run tree -------------------------------------------------------
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: Optional[str],
+               event: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id else None
+            if parent is None:
+                run = {"root": run_id, "node": None, "depth": 0,
+                       "sampled": self.level != "off" and random.random() < self.sample_rate}
+            else:
+                is_node = parent["depth"] == 0 and not (name or "").startswith("__")
+                run = {"root": parent["root"], "node": name if is_node else parent["node"],
+                       "depth": parent["depth"] + 1, "sampled": parent["sampled"], "is_node": is_node}
+            run.update(name=name or "", kind=event.split("_")[0], start=time.perf_counter())
+            self._runs[run_id] = run
+        if run["sampled"] and self.level == "full":
+            self._emit(event, run, run_id, parent_run_id=parent_run_id, **payload)
+
+    def _end(self, run_id: UUID, event: str, status: str = "ok", **payload):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None or not run["sampled"]:
+            return
+        duration = round(time.perf_counter() - run["start"], 3)
+        if self.level == "full" or event == "llm_end":
+            self._emit(event, run, run_id, status=status, duration_s=duration, **payload)
+        elif run["depth"] == 0 and run["kind"] == "chain":
+            self._emit("run_end", run, run_id, status=status, duration_s=duration)
+        elif run.get("is_node"):
+            self._emit("node_end", run, run_id, status=status, duration_s=duration)
+
+    def _emit(self, event: str, run: Dict[str, Any], run_id: UUID, **fields):
+        record = {"ts": time.time(), "event": event, "trace_id": str(run["root"]),
+                  "run_id": str(run_id), "name": run["name"], "node": run["node"]}
+        record.update(fields)
+        if "parent_run_id" in record:
+            record["parent_run_id"] = str(record["parent_run_id"]) if record["parent_run_id"] else None
+        self.sink.emit(record)
+
+    # -- callbacks ------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._start(run_id, parent_run_id, name, "chain_start", {"inputs": inputs})
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, "chain_end", outputs=outputs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "chain_end", status="error", error=repr(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._start(run_id, parent_run_id, name, "tool_start", {"input": input_str})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, "tool_end", output=output)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "tool_end", status="error", error=repr(error))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model", "")
+        self._start(run_id, parent_run_id, kwargs.get("name") or model, "llm_start",
+                    {"model": model, "messages": messages})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model", "")
+        self._start(run_id, parent_run_id, kwargs.get("name") or model, "llm_start",
+                    {"model": model, "prompts": prompts})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = dict(getattr(message, "usage_metadata", None) or {}) or usage
+        payload = {"input_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0)}
+        if self.level == "full":
+            payload["outputs"] = [[g.message if hasattr(g, "message") else g.text for g in gens]
+                                  for gens in response.generations]
+        self._end(run_id, "llm_end", **payload)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "llm_end", status="error", error=repr(error))
+
+
+_handler: Optional[TraceHandler] = None
+_handler_lock = threading.Lock()
+
+
+def configure_tracing(level: Optional[str] = None, trace_file: Optional[str] = None,
+                      sample_rate: Optional[float] = None) -> Optional[TraceHandler]:
+    """
+    Set up process-wide tracing, replacing LangChain's global debug/verbose output.
+
+    Arguments default to the TRACE_LEVEL (off/summary/full, default summary),
+    TRACE_FILE (JSON-lines path; console when unset) and TRACE_SAMPLE_RATE
+    (fraction of runs traced, default 1.0) environment variables. The handler
+    reaches every LangChain run through a configure hook, so nothing has to be
+    passed in callbacks; with level off no hook is installed at all.
+    """
+    global _handler
+    level = (level or os.getenv("TRACE_LEVEL") or DEFAULT_TRACE_LEVEL).lower()
+    if level not in TRACE_LEVELS:
+        raise ValueError(f"Unknown trace level '{level}'. Expected one of: {', '.join(TRACE_LEVELS)}")
+    trace_file = trace_file or os.getenv("TRACE_FILE")
+    if sample_rate is None:
+        sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+
+    with _handler_lock:
+        if _handler is None and level == "off":
+            return None
+        current = _handler.sink if _handler is not None else None
+        if trace_file and isinstance(current, JsonlSink) and current.writes_to(trace_file):
+            sink = current  # same file: keep the open handle
+        else:
+            sink = JsonlSink(trace_file) if trace_file else ConsoleSink(full=level == "full")
+        if _handler is None:
+            _handler = TraceHandler(level, sink, sample_rate)
+            register_configure_hook(ContextVar("app_builder_tracer", default=_handler), inheritable=True)
+        else:
+            _handler.reconfigure(level, sink, sample_rate)
+        return _handler
@@ -5,21 +5,16 @@ Each app has comprehensive requirements for beautiful UI and error-free logic
 """
 
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 from dotenv import load_dotenv
-from agent.graph import agent
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agent.context_packer import DEFAULT_TOKEN_BUDGET, PackedContext, pack_context
+from agent.llm import get_llm, needs_api_key
+from agent.patching import PatchConflict, apply_line_edits, number_lines
+from agent.streaming import FileBlockStream, stream_text
 
 load_dotenv()
 
-# Initialize Gemini for direct editing
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.1,
-    max_retries=3
-)
-
 @dataclass
 class AppSpec:
     name: str
@@ -403,12 +398,18 @@ APPS = {
     "age": AGE_CALCULATOR_SPEC
 }
 
-def generate_app(app_name: str) -> Dict[str, Any]:
+def generate_app(app_name: str, check_satisfaction: bool = True, stream_edits: bool = False,
+                 resume: Optional[str] = None) -> Dict[str, Any]:
     """
     Generate an app based on its name using detailed prompts with satisfaction checking.
     
     Args:
         app_name: Name of the app to generate (calculator, todo, grades, quiz, age)
+        check_satisfaction: Ask the user for feedback afterwards; pass False for
+            unattended runs (see batch_generate.py)
+        stream_edits: Stream feedback edits and save each file as soon as it is complete
+        resume: Thread id of a failed build of this app to continue from its last
+            completed step instead of starting over
         
     Returns:
         Dict containing the generation result with satisfaction status
@@ -429,17 +430,32 @@ def generate_app(app_name: str) -> Dict[str, Any]:
     print(f"⚙️ Logic: {app_spec.logic_requirements}")
     print("=" * 60)
     
+    # The graph, LangChain and the Gemini client load here rather than at import,
+    # so listing apps and --help stay fast
+    from agent.checkpoints import BuildNotFound, new_thread_id
+    from agent.interactive_editor import STATE_DIR_NAME
+    from agent.metrics import REPORT_FILE
+    from agent.runner import resume_build, run_build
+
+    thread_id = resume or new_thread_id()
     try:
-        # Generate the application using the comprehensive prompt
-        result = agent.invoke({
-            "user_prompt": app_spec.prompt,
-            "use_auto_debug": True  # Enable auto-debugging for error-free output
-        }, {"recursion_limit": 50})
+        if resume:
+            result = resume_build(resume, recursion_limit=50)
+        else:
+            # Generate the application using the comprehensive prompt
+            print(f"🧵 Build {thread_id} (if it fails, rerun with --resume {thread_id})")
+            result = run_build(app_spec.prompt, recursion_limit=50, thread_id=thread_id,
+                               plan_cache_key=app_spec.name,  # reuse a validated plan of this app
+                               use_auto_debug=True)  # Enable auto-debugging for error-free output
+        print(f"📈 Run report: {os.path.join(result['project_root'], STATE_DIR_NAME, REPORT_FILE)}")
         
         print(f"\n✅ {app_spec.description} generated successfully!")
         
         # Check satisfaction and provide editing option
-        satisfaction_result = check_satisfaction_and_edit(app_spec, result)
+        if check_satisfaction:
+            satisfaction_result = check_satisfaction_and_edit(app_spec, result, stream_edits)
+        else:
+            satisfaction_result = {"satisfied": not result.get("has_errors"), "edit_count": 0}
         
         return {
             "success": True,
@@ -452,33 +468,40 @@ def generate_app(app_name: str) -> Dict[str, Any]:
             "edit_count": satisfaction_result.get("edit_count", 0)
         }
         
+    except BuildNotFound as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "app_name": app_spec.name
+        }
     except Exception as e:
         print(f"❌ Error generating {app_spec.description}: {e}")
         return {
             "success": False,
             "error": str(e),
-            "app_name": app_spec.name
+            "app_name": app_spec.name,
+            "thread_id": thread_id
         }
 
-def check_satisfaction_and_edit(app_spec, generation_result) -> Dict[str, Any]:
+def check_satisfaction_and_edit(app_spec, generation_result, stream_edits: bool = False) -> Dict[str, Any]:
     """Check user satisfaction and provide Gemini-powered editing options."""
     print(f"\n{'='*60}")
     print(f"🎯 {app_spec.description} Generation Complete!")
     print(f"{'='*60}")
     
-    # Show generated files location
-    project_path = None
-    if os.path.exists("generated_projects"):
+    # Show generated files location; a resumed build may not be the latest folder
+    project_path = generation_result.get("project_root")
+    if project_path is None and os.path.exists("generated_projects"):
         projects = [d for d in os.listdir("generated_projects") 
                    if os.path.isdir(os.path.join("generated_projects", d))]
         if projects:
-            latest_project = max(projects)
-            project_path = os.path.join("generated_projects", latest_project)
-            files = os.listdir(project_path)
-            
-            print(f"\n📁 Generated in: {project_path}")
-            print(f"📄 Files: {', '.join(files)}")
-            print(f"\n🌐 Open {os.path.join(project_path, 'index.html')} in your browser!")
+            project_path = os.path.join("generated_projects", max(projects))
+    if project_path:
+        files = os.listdir(project_path)
+        
+        print(f"\n📁 Generated in: {project_path}")
+        print(f"📄 Files: {', '.join(files)}")
+        print(f"\n🌐 Open {os.path.join(project_path, 'index.html')} in your browser!")
     
     edit_count = 0
     
@@ -509,7 +532,8 @@ def check_satisfaction_and_edit(app_spec, generation_result) -> Dict[str, Any]:
                 # Apply Gemini edit
                 print(f"\n🤖 Using Gemini to apply your changes...")
                 if project_path:
-                    edit_result = apply_gemini_edit_to_project(project_path, feedback, app_spec)
+                    edit_result = apply_gemini_edit_to_project(project_path, feedback, app_spec,
+                                                               stream=stream_edits)
                     
                     if edit_result.get("success"):
                         print(f"✅ Changes applied successfully!")
@@ -530,8 +554,17 @@ def check_satisfaction_and_edit(app_spec, generation_result) -> Dict[str, Any]:
             print(f"\n⚠️ Input ended. Assuming satisfied.")
             return {"satisfied": True, "edit_count": edit_count}
 
-def apply_gemini_edit_to_project(project_path: str, feedback: str, app_spec) -> Dict[str, Any]:
-    """Apply user feedback using Gemini to edit the generated project files."""
+def apply_gemini_edit_to_project(project_path: str, feedback: str, app_spec, mode: str = "patch",
+                                 context_budget: int = DEFAULT_TOKEN_BUDGET, stream: bool = False) -> Dict[str, Any]:
+    """
+    Apply user feedback using Gemini to edit the generated project files.
+
+    mode="patch" asks for line-range edits and falls back to complete files
+    when any edit conflicts; mode="rewrite" always asks for complete files.
+    When the files exceed context_budget tokens, only the files and sections
+    most relevant to the feedback are sent. With stream=True, complete files
+    from a rewrite are saved while Gemini is still writing the rest.
+    """
     if not project_path or not os.path.exists(project_path):
         return {"success": False, "error": "Project directory not found"}
     
@@ -550,11 +583,102 @@ def apply_gemini_edit_to_project(project_path: str, feedback: str, app_spec) ->
         if not current_files:
             return {"success": False, "error": "No editable files found"}
         
-        # Create edit prompt for Gemini
-        files_content = "\n\n".join([f"=== {filename} ===\n{content}" 
-                                    for filename, content in current_files.items()])
+        context = pack_context(current_files, feedback, context_budget)
+        if context.trimmed:
+            print(f"📦 Edit context: {len(context.files)} full file(s), {len(context.excerpts)} excerpted, "
+                  f"{len(context.omitted)} left out (~{context.tokens} tokens)")
+        
+        saved_files = []
+        
+        def save_file(filename: str, content: str):
+            file_path = os.path.join(project_path, filename)
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                saved_files.append(filename)
+                print(f"📝 Updated: {filename}")
+            except Exception as e:
+                print(f"❌ Failed to save {filename}: {e}")
+        
+        updated_files = None
+        if mode == "patch":
+            updated_files = _patch_project_files(current_files, context, feedback, app_spec)
+        if updated_files is None:
+            updated_files = _rewrite_project_files(context, feedback, app_spec,
+                                                   on_file=save_file if stream else None)
         
-        edit_prompt = f"""
+        if not updated_files:
+            return {"success": False, "error": "Could not parse Gemini response"}
+        
+        # Save updated files (streamed rewrites have saved theirs already)
+        for filename, content in updated_files.items():
+            if filename not in saved_files:
+                save_file(filename, content)
+        
+        return {"success": True, "updated_files": saved_files}
+        
+    except Exception as e:
+        return {"success": False, "error": f"Gemini edit failed: {str(e)}"}
+
+def _patch_project_files(current_files: Dict[str, str], context: PackedContext, feedback: str, app_spec) -> Optional[Dict[str, str]]:
+    """Ask Gemini for line-range edits; returns the patched files, or None to fall back to a rewrite."""
+    from agent.states import ProjectPatch
+
+    blocks = [f"=== {filename} ===\n{number_lines(content)}" for filename, content in context.files.items()]
+    for filename, sections in context.excerpts.items():
+        blocks.extend(f"=== {filename} (excerpt, lines {s.start_line}-{s.end_line}) ===\n"
+                      f"{number_lines(s.text, s.start_line)}" for s in sections)
+    files_content = "\n\n".join(blocks)
+    
+    edit_prompt = f"""
+You are an expert web developer. I have a {app_spec.description} that needs improvements based on user feedback.
+
+CURRENT PROJECT FILES (each line is prefixed with "<line number> | ", which is NOT part of the file):
+{files_content}
+
+USER FEEDBACK: {feedback}
+
+TASK: Apply the user's feedback with the smallest edits that do it. Requirements:
+1. Keep all existing functionality that works correctly
+2. Apply the requested changes/improvements precisely
+3. Maintain beautiful, modern, responsive design
+4. Ensure error-free, clean code
+
+Return only the files and lines that change. For every edit give start_line and end_line (inclusive),
+original_text copied exactly from those lines WITHOUT the number prefixes, and new_text to put in their place.
+Use the file names exactly as shown. Edits within a file must not overlap.
+"""
+    patch: ProjectPatch = get_llm().with_structured_output(ProjectPatch).invoke(edit_prompt)
+    if patch is None or not patch.files:
+        print("↪️  No usable edits, requesting complete files")
+        return None
+    
+    # Apply every file's edits before writing anything, so a conflict leaves the project untouched
+    updated_files = {}
+    try:
+        for file_patch in patch.files:
+            if file_patch.file_path not in context.files and file_patch.file_path not in context.excerpts:
+                raise PatchConflict(f"unknown file '{file_patch.file_path}'")
+            original = updated_files.get(file_patch.file_path, current_files[file_patch.file_path])
+            updated_files[file_patch.file_path] = apply_line_edits(original, file_patch.edits)
+    except PatchConflict as e:
+        print(f"↪️  Patch did not apply ({e}), requesting complete files")
+        return None
+    return updated_files
+
+def _rewrite_project_files(context: PackedContext, feedback: str, app_spec, on_file=None) -> Dict[str, str]:
+    """
+    Ask Gemini for complete updated files; excerpted files are reference only and never rewritten.
+    With on_file, the reply is streamed and on_file(name, content) runs as each file completes.
+    """
+    files_content = "\n\n".join([f"=== {filename} ===\n{content}" 
+                                for filename, content in context.files.items()])
+    if context.excerpts:
+        files_content += "\n\nREFERENCE EXCERPTS (do not return these files):\n" + "\n\n".join(
+            f"--- {filename}, lines {s.start_line}-{s.end_line} ---\n{s.text}"
+            for filename, sections in context.excerpts.items() for s in sections)
+    
+    edit_prompt = f"""
 You are an expert web developer. I have a {app_spec.description} that needs improvements based on user feedback.
 
 CURRENT PROJECT FILES:
@@ -579,60 +703,29 @@ Return ONLY the updated files in this exact format:
 === filename.ext ===
 [complete updated file content]
 """
+    
+    if on_file is not None:
+        def on_block(name: str, content: str):
+            if name in context.files:
+                on_file(name, content)
         
+        parser = FileBlockStream(on_block)
+        stream_text(get_llm(), edit_prompt, parser.feed)
+        updated_files = parser.close()
+    else:
         # Get Gemini response
-        response = llm.invoke(edit_prompt)
+        response = get_llm().invoke(edit_prompt)
         response_text = str(response.content) if hasattr(response, 'content') else str(response)
         
         # Parse updated files from response
         updated_files = parse_gemini_response(response_text)
-        
-        if not updated_files:
-            return {"success": False, "error": "Could not parse Gemini response"}
-        
-        # Save updated files
-        saved_files = []
-        for filename, content in updated_files.items():
-            file_path = os.path.join(project_path, filename)
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                saved_files.append(filename)
-                print(f"📝 Updated: {filename}")
-            except Exception as e:
-                print(f"❌ Failed to save {filename}: {e}")
-        
-        return {"success": True, "updated_files": saved_files}
-        
-    except Exception as e:
-        return {"success": False, "error": f"Gemini edit failed: {str(e)}"}
+    return {name: content for name, content in updated_files.items() if name in context.files}
 
 def parse_gemini_response(response_text: str) -> Dict[str, str]:
     """Parse Gemini response to extract updated file contents."""
-    files = {}
-    current_file = None
-    current_content = []
-    
-    lines = response_text.split('\n')
-    
-    for line in lines:
-        if line.startswith('=== ') and line.endswith(' ==='):
-            # Save previous file if exists
-            if current_file and current_content:
-                files[current_file] = '\n'.join(current_content).strip()
-            
-            # Start new file
-            current_file = line[4:-4].strip()
-            current_content = []
-        else:
-            if current_file:
-                current_content.append(line)
-    
-    # Save last file
-    if current_file and current_content:
-        files[current_file] = '\n'.join(current_content).strip()
-    
-    return files
+    parser = FileBlockStream()
+    parser.feed(response_text)
+    return parser.close()
 
 def list_available_apps():
     """List all available apps with their descriptions."""
@@ -655,6 +748,8 @@ def main():
         print("🚀 GenAI App Builder - Detailed Prompts System")
         print("=" * 50)
         print("Usage: python app_prompts.py <app_name>")
+        print("       python app_prompts.py <app_name> --stream")
+        print("       python app_prompts.py <app_name> --resume <thread_id>")
         print("       python app_prompts.py --list")
         print()
         list_available_apps()
@@ -667,13 +762,14 @@ def main():
     app_name = sys.argv[1].lower()
     
     # Check if API key is available
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY not found in environment variables")
         print("Please set your Google Gemini API key in the .env file")
         return
     
     # Generate the requested app
-    result = generate_app(app_name)
+    resume = sys.argv[sys.argv.index("--resume") + 1] if "--resume" in sys.argv[2:-1] else None
+    result = generate_app(app_name, stream_edits="--stream" in sys.argv[2:], resume=resume)
     
     if result["success"]:
         print(f"\n🎉 {result['description']} completed!")
@@ -710,6 +806,8 @@ def main():
         
     else:
         print(f"\n❌ Generation failed: {result.get('error', 'Unknown error')}")
+        if result.get("thread_id"):
+            print(f"⏯️ Resume with: python app_prompts.py {app_name} --resume {result['thread_id']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Batch App Generator - Build several apps at once without prompts
+Usage: python batch_generate.py calculator todo grades --workers 3
+       python batch_generate.py --file requests.jsonl --output results.jsonl
+
+Each finished build appends one JSON record (status, duration, token usage,
+remaining errors) to the output file. No satisfaction check is run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from app_prompts import APPS
+from agent.interactive_editor import InteractiveCodeEditor
+from agent.llm import needs_api_key
+
+if TYPE_CHECKING:
+    from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+DEFAULT_WORKERS = 3
+DEFAULT_OUTPUT = "batch_results.jsonl"
+
+
+def load_batch_entries(app_names: List[str], jsonl_path: str = None) -> List[Dict[str, str]]:
+    """
+    Turn app names and/or a JSONL file into build entries of {"id", "prompt"},
+    plus "app" for registered apps, whose builds use the plan cache.
+
+    JSONL lines may name a registered app ({"app": "calculator"}) or carry a
+    free-form prompt ({"prompt": ...}, or {"request_id", "title", "body"}
+    like requests.jsonl).
+    """
+    entries = []
+    for name in app_names:
+        if name.lower() not in APPS:
+            raise ValueError(f"App '{name}' not found. Available apps: {', '.join(APPS.keys())}")
+        entries.append({"id": name.lower(), "prompt": APPS[name.lower()].prompt, "app": name.lower()})
+
+    if jsonl_path:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                app_name = str(record.get("app") or record.get("app_name") or "").lower()
+                if app_name:
+                    if app_name not in APPS:
+                        raise ValueError(f"{jsonl_path}:{line_num}: unknown app '{app_name}'")
+                    entries.append({"id": record.get("id", app_name), "prompt": APPS[app_name].prompt,
+                                    "app": app_name})
+                elif record.get("prompt") or record.get("body"):
+                    prompt = record.get("prompt") or f"{record.get('title', '')}\n\n{record['body']}".strip()
+                    entry_id = record.get("request_id") or record.get("id") or f"line_{line_num}"
+                    entries.append({"id": entry_id, "prompt": prompt})
+                else:
+                    raise ValueError(f"{jsonl_path}:{line_num}: expected 'app', 'prompt' or 'body'")
+
+    return entries
+
+
+def _sum_usage(handler: "UsageMetadataCallbackHandler") -> Dict[str, int]:
+    totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for usage in handler.usage_metadata.values():
+        for key in totals:
+            totals[key] += usage.get(key, 0)
+    return totals
+
+
+async def build_entry(entry: Dict[str, str], semaphore: asyncio.Semaphore,
+                      recursion_limit: int, parallel_coder: bool) -> Dict[str, Any]:
+    """Build one entry and return its result record."""
+    from langchain_core.callbacks import UsageMetadataCallbackHandler
+    from agent.runner import arun_build
+
+    async with semaphore:
+        usage = UsageMetadataCallbackHandler()
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"id": entry["id"]}
+        try:
+            result = await arun_build(entry["prompt"], recursion_limit=recursion_limit,
+                                      callbacks=[usage], use_auto_debug=True,
+                                      parallel_coder=parallel_coder, plan_cache_key=entry.get("app"))
+            project_root = result["project_root"]
+            errors = await asyncio.to_thread(InteractiveCodeEditor(project_root).detect_errors)
+            record.update({
+                "status": "errors" if errors else "success",
+                "project_path": project_root,
+                "errors_remaining": [f"{e['file']}:{e['line']} {e['message']}" for e in errors],
+            })
+        except Exception as e:
+            record.update({"status": "failed", "error": str(e), "errors_remaining": []})
+
+        record["duration_s"] = round(time.perf_counter() - started, 2)
+        record["token_usage"] = _sum_usage(usage)
+        return record
+
+
+async def run_batch(entries: List[Dict[str, str]], workers: int = DEFAULT_WORKERS,
+                    output_path: str = DEFAULT_OUTPUT, recursion_limit: int = 50,
+                    parallel_coder: bool = False) -> List[Dict[str, Any]]:
+    """Build all entries, at most `workers` at a time, appending records as they finish."""
+    semaphore = asyncio.Semaphore(max(1, workers))
+    tasks = [asyncio.create_task(build_entry(entry, semaphore, recursion_limit, parallel_coder))
+             for entry in entries]
+
+    records = []
+    with open(output_path, "a", encoding="utf-8") as out:
+        for finished in asyncio.as_completed(tasks):
+            record = await finished
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            icon = {"success": "✅", "errors": "⚠️"}.get(record["status"], "❌")
+            print(f"{icon} {record['id']}: {record['status']} in {record['duration_s']}s")
+
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate several apps concurrently without user interaction")
+    parser.add_argument("apps", nargs="*", help=f"App names ({', '.join(APPS.keys())}) or 'all'")
+    parser.add_argument("--file", "-f", help="JSONL file of apps or prompts to build")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS,
+                        help=f"Builds to run at the same time (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT,
+                        help=f"JSONL file to append result records to (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--parallel-coder", action="store_true",
+                        help="Also code independent files of each app concurrently")
+    args = parser.parse_args()
+
+    app_names = list(APPS.keys()) if args.apps == ["all"] else args.apps
+    if not app_names and not args.file:
+        parser.print_help()
+        return
+
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
+        print("❌ Error: GOOGLE_API_KEY not found")
+        print("Please set your Google Gemini API key in the .env file")
+        sys.exit(1)
+
+    try:
+        entries = load_batch_entries(app_names, args.file)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"🚀 Building {len(entries)} app(s) with {args.workers} worker(s)")
+    records = asyncio.run(run_batch(entries, args.workers, args.output,
+                                    parallel_coder=args.parallel_coder))
+
+    succeeded = sum(1 for r in records if r["status"] == "success")
+    print(f"\n📊 {succeeded}/{len(records)} built without errors. Results: {args.output}")
+    if succeeded != len(records):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
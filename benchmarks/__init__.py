@@ -0,0 +1 @@
+"""Benchmarks for the build pipeline; run with python -m benchmarks.run"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmarks
+Usage: python -m benchmarks.run                       # all stages and sizes, compared to the baseline
+       python -m benchmarks.run --stages edit --sizes large --iterations 20
+       python -m benchmarks.run --update-baseline     # after an intended change
+
+Every (stage, size) case runs in its own process with the offline LLM backend
+(LLM_BACKEND, default scripted), so peak RSS is per stage and no API key or
+network is needed. Reports p50/p95 latency, throughput and peak RSS, and exits
+non-zero when a case regresses past the tolerance against baseline.json.
+
+baseline.json holds absolute timings from the machine that recorded it. On
+another host (different platform, Python, architecture or CPU count) a
+warning is printed and the comparison only means something once you have
+run --update-baseline there; don't commit a baseline from a slower machine.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stages import PIPELINE_SIZE, STAGES
+from benchmarks.synthetic import SIZES, project_stats
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_ITERATIONS = 10
+DEFAULT_WARMUP = 1
+DEFAULT_TOLERANCE = 0.30
+# timing differences below this are noise, whatever the ratio
+MIN_REGRESSION_S = 0.005
+RSS_TOLERANCE = 0.20
+# meta fields that make timings from two machines comparable
+HOST_KEYS = ("platform", "python", "machine", "cpus")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without floats drifting
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(stage: str, size: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    """Run one case in this process and return its measurements."""
+    setup, _ = STAGES[stage]
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        workdir = Path(tmp)
+        # graph stages checkpoint every node; keep the database out of the repo
+        os.environ["BUILD_CHECKPOINT_DB"] = str(workdir / "checkpoints.sqlite")
+        with contextlib.redirect_stdout(devnull):
+            run = setup(workdir, size)
+            for i in range(warmup):
+                run(-1 - i)
+            latencies = []
+            for i in range(iterations):
+                started = time.perf_counter()
+                run(i)
+                latencies.append(time.perf_counter() - started)
+        stats = project_stats(workdir / "project") if (workdir / "project").exists() else {}
+    return {
+        "stage": stage,
+        "size": size,
+        **stats,
+        "iterations": iterations,
+        "p50_s": round(percentile(latencies, 50), 5),
+        "p95_s": round(percentile(latencies, 95), 5),
+        "mean_s": round(sum(latencies) / len(latencies), 5),
+        "throughput_per_s": round(len(latencies) / sum(latencies), 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_case(stage: str, size: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    """Measure one case in a fresh interpreter."""
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "scripted")
+    env.setdefault("TRACE_LEVEL", "off")
+    env.setdefault("LLM_CACHE", "off")
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--case", f"{stage}:{size}",
+         "--iterations", str(iterations), "--warmup", str(warmup)],
+        cwd=Path(__file__).resolve().parent.parent, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{stage}:{size} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(case: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regressions of one case against its baseline entry, as readable strings."""
+    if not baseline:
+        return []
+    regressions = []
+    for key in ("p50_s", "p95_s"):
+        if (case[key] > baseline[key] * (1 + tolerance)
+                and case[key] - baseline[key] > MIN_REGRESSION_S):
+            regressions.append(f"{key} {baseline[key]:.4f}s -> {case[key]:.4f}s")
+    if (case.get("peak_rss_mb") and baseline.get("peak_rss_mb")
+            and case["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + RSS_TOLERANCE)):
+        regressions.append(f"peak RSS {baseline['peak_rss_mb']}MB -> {case['peak_rss_mb']}MB")
+    return regressions
+
+
+def host_meta() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def host_mismatch(baseline_meta: Dict[str, Any], meta: Dict[str, Any]) -> List[str]:
+    """Host fields recorded in the baseline that differ on this machine; older baselines lack some."""
+    return [f"{key} {baseline_meta[key]} -> {meta[key]}" for key in HOST_KEYS
+            if key in baseline_meta and baseline_meta[key] != meta[key]]
+
+
+def case_id(case: Dict[str, Any]) -> str:
+    return f"{case['stage']}:{case['size']}"
+
+
+def print_table(cases: List[Dict[str, Any]], regressions: Dict[str, List[str]]):
+    print(f"{'case':<34} {'files':>5} {'lines':>6} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>8} {'RSS MB':>7}  status")
+    for case in cases:
+        status = "REGRESSED: " + "; ".join(regressions[case_id(case)]) if regressions.get(case_id(case)) else "ok"
+        print(f"{case_id(case):<34} {case.get('files', '-'):>5} {case.get('lines', '-'):>6} "
+              f"{case['p50_s'] * 1000:>9.1f} {case['p95_s'] * 1000:>9.1f} {case['throughput_per_s']:>8.1f} "
+              f"{case['peak_rss_mb'] if case['peak_rss_mb'] is not None else '-':>7}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the build pipeline with an offline LLM",
+        epilog="The baseline is machine-specific: on a new host, run once with --update-baseline "
+               "and compare later runs against that.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="Stages to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES),
+                        help="Synthetic project sizes (default: all)")
+    parser.add_argument("--iterations", "-n", type=int, default=DEFAULT_ITERATIONS,
+                        help=f"Timed iterations per case (default: {DEFAULT_ITERATIONS})")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help=f"Untimed iterations first (default: {DEFAULT_WARMUP})")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH),
+                        help="Baseline JSON to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write this run's results as the new baseline (recording this host)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed p50/p95 slowdown before a regression (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--output", "-o", help="Also write the results as JSON to this file")
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # internal: run one case in this process
+    args = parser.parse_args()
+
+    if args.case:
+        stage, size = args.case.split(":", 1)
+        print(json.dumps(measure(stage, size, args.iterations, args.warmup)))
+        return
+
+    cases = []
+    for stage in args.stages:
+        for size in (args.sizes if STAGES[stage][1] else [PIPELINE_SIZE]):
+            print(f"⏱️  {stage}:{size}", file=sys.stderr)
+            cases.append(run_case(stage, size, args.iterations, args.warmup))
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {"cases": {}}
+    regressions = {case_id(c): compare(c, baseline["cases"].get(case_id(c)), args.tolerance) for c in cases}
+    meta = host_meta()
+    mismatch = host_mismatch(baseline.get("meta", {}), meta)
+    if mismatch and not args.update_baseline:
+        print(f"⚠️ Baseline was recorded on another host ({'; '.join(mismatch)}); timings are not comparable. "
+              f"Run with --update-baseline to record one for this machine.", file=sys.stderr)
+    print_table(cases, regressions)
+
+    results = {
+        "meta": {**meta, "llm_backend": os.getenv("LLM_BACKEND", "scripted"),
+                 "iterations": args.iterations, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "cases": {case_id(c): c for c in cases},
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.update_baseline:
+        merged = {**baseline.get("cases", {}), **results["cases"]}
+        baseline_path.write_text(json.dumps({**results, "cases": merged}, indent=2) + "\n", encoding="utf-8")
+        print(f"📌 Baseline updated: {baseline_path}")
+    elif any(regressions.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
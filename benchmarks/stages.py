@@ -0,0 +1,73 @@
+"""
+Benchmark Stages
+Each stage prepares its inputs once, then runs one timed iteration per call
+"""
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from benchmarks.synthetic import make_project
+
+BUILD_PROMPT = "Build a colourful counter app in html, css and js"
+EDIT_FEEDBACK = "Make the buttons larger and give each card a blue border"
+# stages that don't take a synthetic project run once, under this size label
+PIPELINE_SIZE = "pipeline"
+
+Runner = Callable[[int], object]
+
+
+def _graph(workdir: Path, size: str) -> Runner:
+    from agent.runner import run_build
+
+    def run(i: int):
+        return run_build(BUILD_PROMPT, project_root=str(workdir / f"build_{i}"), use_auto_debug=True)
+    return run
+
+
+def _graph_stream_architect(workdir: Path, size: str) -> Runner:
+    from agent.runner import run_build
+
+    def run(i: int):
+        return run_build(BUILD_PROMPT, project_root=str(workdir / f"build_{i}"), use_auto_debug=True,
+                         stream_architect=True)
+    return run
+
+
+def _detect_errors(workdir: Path, size: str) -> Runner:
+    from agent.interactive_editor import InteractiveCodeEditor
+
+    root = make_project(workdir / "project", size)
+    return lambda i: InteractiveCodeEditor(str(root), use_validation_cache=False).detect_errors()
+
+
+def _detect_errors_warm(workdir: Path, size: str) -> Runner:
+    from agent.interactive_editor import InteractiveCodeEditor
+
+    root = make_project(workdir / "project", size)
+    InteractiveCodeEditor(str(root)).detect_errors()  # fill the validation cache
+    return lambda i: InteractiveCodeEditor(str(root)).detect_errors()
+
+
+def _auto_debug(workdir: Path, size: str) -> Runner:
+    from agent.auto_debugger import auto_debug_project
+
+    root = make_project(workdir / "project", size)
+    # without triage every file is analyzed, so the LLM path is exercised on clean files too
+    return lambda i: auto_debug_project(str(root), triage=False)
+
+
+def _edit(workdir: Path, size: str) -> Runner:
+    from app_prompts import APPS, apply_gemini_edit_to_project
+
+    root = make_project(workdir / "project", size)
+    return lambda i: apply_gemini_edit_to_project(str(root), EDIT_FEEDBACK, APPS["calculator"], mode="patch")
+
+
+# name -> (setup(workdir, size) -> runner, takes a synthetic project)
+STAGES: Dict[str, Tuple[Callable[[Path, str], Runner], bool]] = {
+    "graph": (_graph, False),
+    "graph_stream_architect": (_graph_stream_architect, False),
+    "detect_errors": (_detect_errors, True),
+    "detect_errors_warm": (_detect_errors_warm, True),
+    "auto_debug": (_auto_debug, True),
+    "edit": (_edit, True),
+}
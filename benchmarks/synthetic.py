@@ -0,0 +1,85 @@
+"""
+Synthetic Projects
+Deterministic, error-free HTML/CSS/JS projects of increasing size for the benchmarks
+"""
+from pathlib import Path
+from typing import Dict, Tuple
+
+# size -> (pages, components per page); every page has its own HTML, CSS and JS file
+SIZES: Dict[str, Tuple[int, int]] = {
+    "small": (1, 10),
+    "medium": (3, 40),
+    "large": (8, 120),
+}
+
+
+def _page_name(page: int) -> str:
+    return "index" if page == 0 else f"page{page}"
+
+
+def _html(page: int, components: int) -> str:
+    name = _page_name(page)
+    cards = "\n".join(
+        f'        <section class="card card-{i}" id="card{i}">\n'
+        f'            <h2 class="card-title">Item {i}</h2>\n'
+        f'            <p id="value{i}">0</p>\n'
+        f'            <button id="increment{i}" class="btn" type="button">Add</button>\n'
+        f'        </section>'
+        for i in range(components)
+    )
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en">\n'
+        "<head>\n"
+        '    <meta charset="UTF-8">\n'
+        '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f"    <title>Benchmark {name}</title>\n"
+        f'    <link rel="stylesheet" href="{name}.css">\n'
+        "</head>\n"
+        "<body>\n"
+        '    <main class="grid">\n'
+        f"{cards}\n"
+        "    </main>\n"
+        f'    <script src="{name}.js"></script>\n'
+        "</body>\n"
+        "</html>\n"
+    )
+
+
+def _css(components: int) -> str:
+    rules = [":root {\n    --accent: #4f46e5;\n    --gap: 1rem;\n}\n",
+             ".grid {\n    display: grid;\n    grid-template-columns: repeat(auto-fill, minmax(12rem, 1fr));\n"
+             "    gap: var(--gap);\n}\n",
+             ".btn {\n    background: var(--accent);\n    color: #fff;\n    border: none;\n}\n"]
+    rules += [f".card-{i} {{\n    border-left: 4px solid hsl({i * 37 % 360}, 70%, 50%);\n    padding: 1rem;\n}}\n"
+              for i in range(components)]
+    return "\n".join(rules)
+
+
+def _js(components: int) -> str:
+    handlers = "\n".join(
+        f"    function updateItem{i}() {{\n"
+        f"        const value = document.getElementById('value{i}');\n"
+        f"        value.textContent = String(Number(value.textContent) + 1);\n"
+        f"    }}\n"
+        f"    document.getElementById('increment{i}').addEventListener('click', updateItem{i});\n"
+        for i in range(components)
+    )
+    return f"document.addEventListener('DOMContentLoaded', () => {{\n{handlers}}});\n"
+
+
+def make_project(root: Path, size: str) -> Path:
+    """Write the project for `size` into root (created if needed) and return root."""
+    pages, components = SIZES[size]
+    root.mkdir(parents=True, exist_ok=True)
+    for page in range(pages):
+        name = _page_name(page)
+        (root / f"{name}.html").write_text(_html(page, components), encoding="utf-8")
+        (root / f"{name}.css").write_text(_css(components), encoding="utf-8")
+        (root / f"{name}.js").write_text(_js(components), encoding="utf-8")
+    return root
+
+
+def project_stats(root: Path) -> Dict[str, int]:
+    files = [p for p in root.iterdir() if p.suffix in (".html", ".css", ".js")]
+    return {"files": len(files), "lines": sum(len(p.read_text(encoding="utf-8").splitlines()) for p in files)}
@@ -6,6 +6,7 @@ Quick demonstration of the AI Auto-Debugger functionality
 import os
 from dotenv import load_dotenv
 from agent.auto_debugger import GeminiCodeDebugger
+from agent.llm import needs_api_key
 
 load_dotenv()
 
@@ -65,7 +66,7 @@ def demo_auto_debugger():
     return analysis
 
 if __name__ == "__main__":
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY environment variable not set")
         exit(1)
     
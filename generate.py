@@ -2,11 +2,13 @@
 """
 Simple App Launcher - Just type the app name to generate!
 Usage: python generate.py calculator
+       python generate.py calculator --resume <thread_id>
 """
 
 import sys
 import os
 from app_prompts import generate_app, list_available_apps
+from agent.llm import needs_api_key
 
 def main():
     """Simple launcher that generates apps by name."""
@@ -21,26 +23,31 @@ def main():
         print("  python generate.py grades")
         print("  python generate.py quiz")
         print("  python generate.py age")
+        print("\nResume a failed build:")
+        print("  python generate.py calculator --resume <thread_id>")
         print()
         list_available_apps()
         return
     
     app_name = sys.argv[1].lower()
+    resume = sys.argv[sys.argv.index("--resume") + 1] if "--resume" in sys.argv[2:-1] else None
     
     # Check API key
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY not found")
         print("Please set your Google Gemini API key in the .env file")
         return
     
     # Generate the app
     print(f"🎯 Generating {app_name} app...")
-    result = generate_app(app_name)
+    result = generate_app(app_name, resume=resume)
     
     if result["success"]:
         print(f"\n✅ {app_name.capitalize()} app generated successfully!")
     else:
         print(f"\n❌ Failed to generate {app_name}: {result.get('error')}")
+        if result.get("thread_id"):
+            print(f"⏯️ Resume with: python generate.py {app_name} --resume {result['thread_id']}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,32 +1,81 @@
 import argparse
 import sys
 import traceback
+from pathlib import Path
 
-from agent.graph import agent
+from agent.constants import DEBUG_MODES
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run engineering project planner")
     parser.add_argument("--recursion-limit", "-r", type=int, default=100,
                         help="Recursion limit for processing (default: 100)")
+    parser.add_argument("--parallel-coder", action="store_true",
+                        help="Code independent files concurrently instead of one step at a time")
+    parser.add_argument("--max-concurrency", type=int, default=4,
+                        help="Maximum files coded at once with --parallel-coder (default: 4)")
+    parser.add_argument("--stream-architect", action="store_true",
+                        help="Start coding each step as soon as the architect streams it, instead of after the whole plan")
+    parser.add_argument("--debug-mode", choices=DEBUG_MODES, default="two_phase",
+                        help="Auto-debugger flow: analyze then fix (two_phase) or one call per file (single_pass)")
+    parser.add_argument("--max-llm-calls", type=int, default=None,
+                        help="Cap on Gemini calls per auto-debug session (default: no cap)")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="Also write the run metrics in Prometheus text format")
+    parser.add_argument("--trace", default=None,
+                        help="Tracing level: off, summary or full (default: TRACE_LEVEL or summary)")
+    parser.add_argument("--trace-file", default=None,
+                        help="Write trace events as JSON lines to this file instead of the console")
+    parser.add_argument("--resume", metavar="THREAD_ID", default=None,
+                        help="Continue a failed or interrupted build from its last completed step")
 
     args = parser.parse_args()
 
+    # Loading the graph pulls in LangChain and LangGraph; keep --help instant
+    from agent.checkpoints import BuildNotFound, new_thread_id
+    from agent.interactive_editor import STATE_DIR_NAME
+    from agent.metrics import REPORT_FILE
+    from agent.runner import resume_build, run_build
+    from agent.tracing import configure_tracing
+
+    if args.trace or args.trace_file:
+        try:
+            configure_tracing(level=args.trace, trace_file=args.trace_file)
+        except ValueError as e:
+            parser.error(str(e))
+
+    thread_id = args.resume or new_thread_id()
     try:
-        user_prompt = input("Enter your project prompt: ")
-        result = agent.invoke(
-            {"user_prompt": user_prompt},
-            {"recursion_limit": args.recursion_limit}
-        )
+        if args.resume:
+            result = resume_build(args.resume, recursion_limit=args.recursion_limit, prometheus=args.prometheus)
+        else:
+            user_prompt = input("Enter your project prompt: ")
+            print(f"🧵 Build {thread_id} (if it fails: python main.py --resume {thread_id})")
+            result = run_build(
+                user_prompt,
+                recursion_limit=args.recursion_limit,
+                prometheus=args.prometheus,
+                thread_id=thread_id,
+                parallel_coder=args.parallel_coder,
+                stream_architect=args.stream_architect,
+                max_concurrency=args.max_concurrency,
+                debug_mode=args.debug_mode,
+                debug_max_llm_calls=args.max_llm_calls,
+            )
         print("Final State:", result)
+        print(f"Run report: {Path(result['project_root']) / STATE_DIR_NAME / REPORT_FILE}")
+    except BuildNotFound as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
+        print(f"Resume with: python main.py --resume {thread_id}")
         sys.exit(0)
     except Exception as e:
         traceback.print_exc()
         print(f"Error: {e}", file=sys.stderr)
+        print(f"Resume with: python main.py --resume {thread_id}", file=sys.stderr)
         sys.exit(1)
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
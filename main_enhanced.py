@@ -7,7 +7,8 @@ Users can choose between manual editing or fully automated debugging.
 import os
 import sys
 from dotenv import load_dotenv
-from agent.graph import agent
+from agent.runner import run_build
+from agent.llm import needs_api_key
 
 # Load environment variables
 load_dotenv()
@@ -42,7 +43,7 @@ def main():
     """Main application entry point."""
     
     # Check if we have the required environment variable
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY environment variable not set")
         print("Please create a .env file with your Google API key:")
         print("GOOGLE_API_KEY=your_api_key_here")
@@ -78,10 +79,7 @@ def main():
     
     try:
         # Run the agent
-        result = agent.invoke({
-            "user_prompt": user_prompt,
-            "use_auto_debug": use_auto_debug
-        }, {"recursion_limit": 100})
+        result = run_build(user_prompt, recursion_limit=100, use_auto_debug=use_auto_debug)
         
         print("\n🎉 BUILD COMPLETED!")
         print("=" * 60)
@@ -141,10 +139,8 @@ def quick_test():
     for i, prompt in enumerate(test_prompts, 1):
         print(f"\n🧪 Test {i}: {prompt}")
         try:
-            result = agent.invoke({
-                "user_prompt": prompt,
-                "use_auto_debug": True  # Use auto-debugging for tests
-            }, {"recursion_limit": 30})
+            result = run_build(prompt, recursion_limit=30,
+                               use_auto_debug=True)  # Use auto-debugging for tests
             
             status = result.get("status", "UNKNOWN")
             has_errors = result.get("has_errors", False)
@@ -9,7 +9,7 @@ from pathlib import Path
 # Add the current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from agent.graph import agent
+from agent.runner import run_build
 from agent.tools import init_project_root, detect_project_errors, start_interactive_editor, PROJECT_ROOT
 from agent.interactive_editor import start_interactive_editing_session
 
@@ -41,7 +41,7 @@ def main():
         try:
             # Run the agent workflow
             print("🤖 Starting AI agents...")
-            result = agent.invoke({"user_prompt": user_prompt}, {"recursion_limit": 100})
+            result = run_build(user_prompt, project_root=project_root, recursion_limit=100)
             
             print("\n✅ Initial project generation completed!")
             print(f"📁 Project location: {project_root}")
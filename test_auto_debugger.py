@@ -6,7 +6,8 @@ This demonstrates fully automated debugging without manual intervention.
 
 import os
 from dotenv import load_dotenv
-from agent.graph import agent
+from agent.runner import run_build
+from agent.llm import needs_api_key
 
 # Load environment variables
 load_dotenv()
@@ -31,10 +32,8 @@ def test_auto_debugger():
         print(f"\n📝 Running agent with prompt: {test_prompt}")
         print("-" * 40)
         
-        result = agent.invoke({
-            "user_prompt": test_prompt,
-            "use_auto_debug": True  # Enable auto-debugging
-        }, {"recursion_limit": 50})
+        result = run_build(test_prompt, recursion_limit=50,
+                           use_auto_debug=True)  # Enable auto-debugging
         
         print("\n✅ Agent execution completed!")
         print("Final State Keys:", list(result.keys()))
@@ -68,10 +67,8 @@ def test_interactive_vs_auto():
     print("-" * 40)
     
     try:
-        result1 = agent.invoke({
-            "user_prompt": test_prompt,
-            "use_auto_debug": False  # Use interactive editing
-        }, {"recursion_limit": 30})
+        result1 = run_build(test_prompt, recursion_limit=30,
+                            use_auto_debug=False)  # Use interactive editing
         
         print("Interactive editing result:", "SUCCESS" if result1.get("interactive_editing_done") else "INCOMPLETE")
         
@@ -82,10 +79,8 @@ def test_interactive_vs_auto():
     print("-" * 40)
     
     try:
-        result2 = agent.invoke({
-            "user_prompt": test_prompt,
-            "use_auto_debug": True  # Use auto-debugging
-        }, {"recursion_limit": 30})
+        result2 = run_build(test_prompt, recursion_limit=30,
+                            use_auto_debug=True)  # Use auto-debugging
         
         print("Auto-debugging result:", "SUCCESS" if result2.get("auto_debugging_done") else "INCOMPLETE")
         
@@ -95,7 +90,7 @@ def test_interactive_vs_auto():
 
 if __name__ == "__main__":
     # Check if we have the required environment variable
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY environment variable not set")
         print("Please set your Google API key in the .env file")
         exit(1)
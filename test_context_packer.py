@@ -0,0 +1,46 @@
+"""
+Test Context Packer
+Checks that an over-budget project still gets packed for a request that matches no code; runs offline
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from agent.context_packer import pack_context
+from benchmarks.synthetic import make_project
+
+BUDGET = 8000
+
+
+def _large_project_files() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp) / "project", "large")
+        return {path.relative_to(root).as_posix(): path.read_text(encoding="utf-8")
+                for path in sorted(root.rglob("*.*"))}
+
+
+def test_unmatched_request_fills_the_budget():
+    """No term of the request occurs in the code: the budget goes to HTML/CSS files, smallest first."""
+    files = _large_project_files()
+    packed = pack_context(files, "Make it look prettier and more modern", BUDGET)
+
+    assert packed.files, "nothing packed for an unmatched request"
+    assert 0 < packed.tokens <= BUDGET
+    assert all(Path(name).suffix in (".html", ".css") for name in [*packed.files, *packed.excerpts])
+    assert set(packed.files) | set(packed.excerpts) | set(packed.omitted) == set(files)
+
+
+def test_plural_request_matches_singular_code():
+    """"buttons" in the request matches the button markup."""
+    packed = pack_context(_large_project_files(), "Make the buttons larger", BUDGET)
+    shown = "".join([*packed.files.values(), *(s.text for secs in packed.excerpts.values() for s in secs)])
+    assert "button" in shown
+
+
+if __name__ == "__main__":
+    test_unmatched_request_fills_the_budget()
+    test_plural_request_matches_singular_code()
+    print("✅ Context packer fills the budget for unmatched requests")
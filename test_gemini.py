@@ -1,13 +1,10 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from agent.llm import get_llm
 
 load_dotenv()
 
-# Test direct model access
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.1
-)
+# Test direct model access (through the shared, rate-limited client)
+llm = get_llm()
 
 # Test simple invocation
 result = llm.invoke("Hello! Say hi back to me.")
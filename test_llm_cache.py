@@ -0,0 +1,63 @@
+"""
+Test LLM Cache
+Checks that a malformed structured-output response is not cached; runs offline, no API key needed
+"""
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, List
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent.llm_cache import PersistentLLMCache
+from agent.states import File, Plan
+
+PLAN = Plan(name="Counter", description="A counter", techstack="html, css, js",
+            features=["count"], files=[File(path="index.html", purpose="page")])
+
+
+class QueuedChatModel(BaseChatModel):
+    """Answers each call with the next queued message."""
+    responses: List[AIMessage]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "queued"
+
+    def bind_tools(self, tools, *, tool_choice: Any = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=self.responses.pop(0))])
+
+
+def test_malformed_response_is_not_cached():
+    """A bad structured-output answer is retried on the next call, a good one is then cached."""
+    bad = AIMessage(content="Sure! Here is your plan.")
+    good = AIMessage(content="", tool_calls=[{"name": "Plan", "args": PLAN.model_dump(), "id": "1"}])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PersistentLLMCache(cache_dir=cache_dir)
+        llm = QueuedChatModel(responses=[bad, good], cache=cache)
+        planner = llm.with_structured_output(Plan)
+
+        assert planner.invoke("plan a counter") is None
+        assert cache.stats()["entries"] == 0
+
+        assert planner.invoke("plan a counter") == PLAN
+        assert planner.invoke("plan a counter") == PLAN  # served from the cache
+        assert llm.calls == 2
+        assert cache.stats()["entries"] == 1
+
+
+if __name__ == "__main__":
+    test_malformed_response_is_not_cached()
+    print("✅ Malformed structured-output responses are not cached")
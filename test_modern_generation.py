@@ -5,7 +5,8 @@ Test the improved code generation system with modern, error-free output
 
 import os
 from dotenv import load_dotenv
-from agent.graph import agent
+from agent.runner import run_build
+from agent.llm import needs_api_key
 
 load_dotenv()
 
@@ -22,10 +23,7 @@ def test_modern_generation():
         print("-" * 30)
         
         # Generate with auto-debugging enabled
-        result = agent.invoke({
-            "user_prompt": test_prompt,
-            "use_auto_debug": True
-        }, {"recursion_limit": 50})
+        result = run_build(test_prompt, recursion_limit=50, use_auto_debug=True)
         
         print("\n✅ Generation completed!")
         
@@ -68,7 +66,7 @@ def test_modern_generation():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY not set")
         exit(1)
     
@@ -7,6 +7,7 @@ This script demonstrates the new features without requiring user interaction.
 import os
 import sys
 from app_prompts import generate_app, APPS
+from agent.llm import needs_api_key
 
 def test_satisfaction_system():
     """Test the enhanced generation system."""
@@ -14,7 +15,7 @@ def test_satisfaction_system():
     print("=" * 70)
     
     # Check if API key is available
-    if not os.getenv("GOOGLE_API_KEY"):
+    if needs_api_key() and not os.getenv("GOOGLE_API_KEY"):
         print("❌ Error: GOOGLE_API_KEY not found in environment variables")
         print("Please set your Google Gemini API key in the .env file")
         return False